@@ -1,7 +1,8 @@
 import streamlit as st
 import requests
 
-from constants import API_URL
+import api_client
+import battery_cache
 
 
 def create_battery(serial_number: str, capacity: int, comments: str):
@@ -10,9 +11,11 @@ def create_battery(serial_number: str, capacity: int, comments: str):
         "capacity": capacity,
         "comments": comments if comments else None
     }
-    response = requests.post(f"{API_URL}/batteries/", json=data)
+    response = api_client.post("/batteries/", json=data)
     response.raise_for_status()
-    return response.json()
+    battery = response.json()
+    battery_cache.on_created(battery)
+    return battery
 
 
 st.title("Добавить новый аккумулятор")
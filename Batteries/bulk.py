@@ -0,0 +1,170 @@
+import csv
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+import streamlit as st
+
+import api_client
+import battery_cache
+from constants import BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_WORKERS
+
+FIELDS = ["serial_number", "capacity", "comments"]
+
+
+def read_upload(uploaded_file):
+    """
+    Читает CSV, JSON-массив или JSON Lines со столбцами serial_number, capacity, comments.
+    """
+    # pandas нужен только для импорта, страница без файла открывается без него
+    import pandas as pd
+
+    if uploaded_file.name.lower().endswith(".csv"):
+        df = pd.read_csv(uploaded_file, dtype={"serial_number": str, "comments": str})
+    else:
+        head = uploaded_file.read(1)
+        uploaded_file.seek(0)
+        df = pd.read_json(uploaded_file, lines=head != b"[", dtype={"serial_number": str, "comments": str})
+    missing = [field for field in FIELDS[:2] if field not in df.columns]
+    if missing:
+        raise ValueError(f"В файле нет столбцов: {', '.join(missing)}")
+    if "comments" not in df.columns:
+        df["comments"] = None
+    return df[FIELDS]
+
+
+def validate(df, existing_serials):
+    """
+    Проверяет все строки одним векторным проходом и возвращает Series с текстом
+    ошибки для каждой строки (пустая строка — без ошибок).
+    """
+    import pandas as pd
+
+    serial = df["serial_number"].fillna("").astype(str).str.strip()
+    capacity = pd.to_numeric(df["capacity"], errors="coerce")
+    serial_key = serial.str.lower()
+
+    checks = [
+        (serial == "", "нет серийного номера"),
+        (serial.str.len() > 50, "серийный номер длиннее 50 символов"),
+        (serial_key.duplicated(keep=False) & (serial != ""), "серийный номер повторяется в файле"),
+        (serial_key.isin(existing_serials), "серийный номер уже зарегистрирован"),
+        (capacity.isna() | (capacity <= 0), "ёмкость должна быть больше 0"),
+        (capacity.notna() & (capacity % 1 != 0), "ёмкость должна быть целым числом"),
+    ]
+    errors = pd.Series("", index=df.index)
+    for mask, message in checks:
+        errors = errors.where(~mask, errors + "; " + message)
+    return errors.str.lstrip("; ")
+
+
+def create_battery(row):
+    data = {
+        "serial_number": row["serial_number"].strip(),
+        "capacity": int(float(row["capacity"])),
+        "comments": row["comments"] if isinstance(row["comments"], str) and row["comments"] else None,
+    }
+    try:
+        response = api_client.post("/batteries/", json=data)
+        response.raise_for_status()
+    except requests.exceptions.HTTPError as e:
+        try:
+            detail = e.response.json().get("detail", "Неизвестная ошибка")
+        except ValueError:
+            detail = e.response.text or "Неизвестная ошибка"
+        return "ошибка", str(detail), None
+    except requests.exceptions.RequestException as e:
+        return "ошибка", str(e), None
+    battery = response.json()
+    battery_cache.on_created(battery)
+    return "добавлен", "", battery["id"]
+
+
+def import_rows(rows, progress):
+    """
+    Отправляет строки пачками по BULK_IMPORT_BATCH_SIZE, внутри пачки —
+    параллельно не более чем в BULK_IMPORT_WORKERS потоков.
+    """
+    results = []
+    with ThreadPoolExecutor(max_workers=BULK_IMPORT_WORKERS) as pool:
+        for start in range(0, len(rows), BULK_IMPORT_BATCH_SIZE):
+            batch = rows[start:start + BULK_IMPORT_BATCH_SIZE]
+            results.extend(pool.map(create_battery, batch))
+            done = min(start + BULK_IMPORT_BATCH_SIZE, len(rows))
+            progress.progress(done / len(rows), text=f"Отправлено {done} из {len(rows)}")
+    return results
+
+
+def export_catalogue(fmt, path):
+    """
+    Выгружает весь каталог постранично в файл path: ни ответы сервера, ни
+    текст выгрузки не собираются в памяти целиком. Кнопка скачивания всё же
+    читает готовый файл в память один раз.
+    """
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "CSV":
+            writer = csv.DictWriter(f, fieldnames=["id"] + FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for page in battery_cache.iter_battery_pages():
+                writer.writerows(page)
+        else:
+            for page in battery_cache.iter_battery_pages():
+                for battery in page:
+                    f.write(json.dumps(battery, ensure_ascii=False))
+                    f.write("\n")
+
+
+st.title("Импорт и экспорт аккумуляторов")
+
+st.subheader("Импорт")
+uploaded_file = st.file_uploader(
+    "Файл CSV или JSON со столбцами serial_number, capacity, comments", type=["csv", "json", "jsonl"]
+)
+
+if uploaded_file is not None:
+    try:
+        df = read_upload(uploaded_file)
+    except ValueError as e:
+        st.error(f"Не удалось прочитать файл: {e}")
+        st.stop()
+
+    existing_serials = battery_cache.get_battery_index().serials()
+    errors = validate(df, existing_serials)
+    valid = errors == ""
+
+    st.write(f"Строк в файле: {len(df)}, готово к импорту: {int(valid.sum())}, с ошибками: {int((~valid).sum())}")
+    if (~valid).any():
+        st.dataframe(df[~valid].assign(ошибка=errors[~valid]), use_container_width=True)
+
+    if valid.any() and st.button(f"Импортировать {int(valid.sum())} аккумуляторов", type="primary"):
+        rows = df[valid].to_dict("records")
+        results = import_rows(rows, st.progress(0.0, text="Отправка"))
+        report = df[valid].assign(
+            статус=[status for status, _, _ in results],
+            ошибка=[detail for _, detail, _ in results],
+            id=[battery_id for _, _, battery_id in results],
+        )
+        added = int((report["статус"] == "добавлен").sum())
+        if added == len(report):
+            st.success(f"Добавлено аккумуляторов: {added}")
+        else:
+            st.warning(f"Добавлено {added} из {len(report)}")
+        st.dataframe(report, use_container_width=True)
+        st.download_button(
+            "Скачать отчёт", report.to_csv(index=False).encode("utf-8"), "import_report.csv", "text/csv"
+        )
+
+st.markdown("---")
+st.subheader("Экспорт")
+export_format = st.radio("Формат", ["CSV", "JSON Lines"], horizontal=True)
+if st.button("Подготовить выгрузку"):
+    file_name = "batteries.csv" if export_format == "CSV" else "batteries.jsonl"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, file_name)
+        export_catalogue(export_format, path)
+        with open(path, "rb") as f:
+            st.download_button(
+                "Скачать каталог", f, file_name, "text/csv" if export_format == "CSV" else "application/x-ndjson"
+            )
@@ -1,23 +1,49 @@
 import streamlit as st
-from typing import List
-import requests
-from constants import API_URL
+import battery_cache
 
+PAGE_SIZES = [25, 50, 100, 200]
 
-def get_batteries(skip: int = 0, limit: int = 100) -> List[dict]:
-    response = requests.get(f"{API_URL}/batteries/?skip={skip}&limit={limit}")
-    response.raise_for_status()
-    return response.json()
+
+def reset_page():
+    st.session_state.battery_page = 1
 
 
 st.title("Просмотр всех аккумуляторов")
 
-batteries = get_batteries()
+col1, col2, col3 = st.columns([3, 1, 1])
+with col1:
+    search = st.text_input("Поиск по серийному номеру", on_change=reset_page).strip()
+with col2:
+    page_size = st.selectbox("Записей на странице", PAGE_SIZES, index=1, on_change=reset_page)
+with col3:
+    page = st.number_input("Страница", min_value=1, step=1, key="battery_page")
+
+# Запрашиваем на одну запись больше, чтобы узнать, есть ли следующая страница.
+# Поиск выполняет сервер: локальный фильтр видел бы только текущую страницу
+skip = (page - 1) * page_size
+batteries = battery_cache.get_batteries(skip, page_size + 1, search or None)
+has_next = len(batteries) > page_size
+batteries = batteries[:page_size]
+
+if has_next:
+    battery_cache.prefetch_batteries(skip + page_size, page_size + 1, search or None)
+
 if batteries:
-    for battery in batteries:
-        with st.expander(f"Аккумулятор #{battery['id']} - {battery['serial_number']}"):
-            st.write(f"**Серийный номер:** {battery['serial_number']}")
-            st.write(f"**Ёмкость:** {battery['capacity']}")
-            st.write(f"**Комментарии:** {battery['comments']}")
+    st.dataframe(
+        batteries,
+        column_order=["id", "serial_number", "capacity", "comments"],
+        column_config={
+            "id": st.column_config.NumberColumn("ID", format="%d"),
+            "serial_number": "Серийный номер",
+            "capacity": st.column_config.NumberColumn("Ёмкость"),
+            "comments": "Комментарии",
+        },
+        hide_index=True,
+        use_container_width=True,
+    )
+    st.caption(f"Страница {page}: записи {skip + 1}–{skip + len(batteries)}"
+               + (", есть следующая страница" if has_next else ""))
+elif page > 1:
+    st.info("На этой странице нет аккумуляторов")
 else:
     st.info("Аккумуляторы не найдены")
@@ -1,25 +1,13 @@
 import streamlit as st
 import requests
-from pydantic import BaseModel
-from typing import List, Dict, Any
+import time
+from typing import Dict, Any
 
-
-class DeviceAnnounce(BaseModel):
-    device_status: str
-    device_name: str
-    device_ip: str
-    sd_free_mem: int
-
-
-def get_device_list():
-    try:
-        response = requests.get("http://localhost:21216/get_device_list")
-        response.raise_for_status()
-        devices = response.json()
-        return [DeviceAnnounce(**device) for device in devices]
-    except requests.exceptions.RequestException as e:
-        st.error(f"Ошибка при получении списка устройств: {e}")
-        return []
+import api_client
+import fleet
+import job_view
+from constants import DEVICE_PROBE_TIMEOUT
+from device_registry import get_registry
 
 
 def execute_device_action(params: Dict[str, Any]):
@@ -27,15 +15,68 @@ def execute_device_action(params: Dict[str, Any]):
     params["polling_rate"] = params["polling_rate"]
 
     st.json({"параметры": params})
-    response = requests.post("http://localhost:21216/start_device_actions", json=params)
+    response = api_client.post("/start_device_actions", json=params)
     st.success(f"Code {response.status_code=}")
 
 
+def show_sd_logs(device):
+    """
+    Логи на SD-карте устройства. Выбранный лог загружается в фоновой задаче
+    прямо в парсер и открывается на странице "Parse file".
+    """
+    import device_logs
+
+    with st.expander("Логи на SD-карте"):
+        key = f"sd_logs_{device.device_ip}"
+        if st.button("Обновить список файлов") or key not in st.session_state:
+            try:
+                st.session_state[key] = device_logs.list_logs(device.device_ip)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                st.error(f"Не удалось получить список файлов: {e}")
+                return
+        entries = {entry["name"]: entry for entry in st.session_state[key]}
+        if not entries:
+            st.info("На SD-карте нет логов")
+            return
+
+        name = st.selectbox(
+            "Файл",
+            list(entries),
+            format_func=lambda name: (
+                f"{name} ({entries[name]['size'] / 2**20:.1f} МБ, "
+                f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(entries[name]['mtime']))})"
+            ),
+        )
+        if st.button("Открыть лог"):
+            st.session_state.sd_opening = {
+                "device_ip": device.device_ip,
+                "entry": entries[name],
+                "title": f"{device.device_name}: {name}",
+            }
+
+        opening = st.session_state.get("sd_opening")
+        if opening is None or opening["device_ip"] != device.device_ip:
+            return
+        _, job = device_logs.load_device_log_async(
+            opening["device_ip"], opening["entry"], f"Загрузка {opening['title']}"
+        )
+        if job is None:
+            st.session_state.device_log = st.session_state.pop("sd_opening")
+            st.switch_page("graphics.py")
+        elif job.error:
+            job_view.show_failed(job)
+        else:
+            job_view.wait_for([job])
+
+
 st.set_page_config(page_title="Управление устройствами", layout="wide")
 
 if 'selected_device' not in st.session_state:
     st.session_state.selected_device = None
 
+if 'fleet_devices' not in st.session_state:
+    st.session_state.fleet_devices = []
+
 if 'test_params' not in st.session_state:
     st.session_state.test_params = {
         "actions": [],
@@ -46,16 +87,33 @@ if 'test_params' not in st.session_state:
         "polling_rate": 5
     }
 
-if st.session_state.selected_device:
-    device = st.session_state.selected_device
+if st.session_state.selected_device or st.session_state.fleet_devices:
+    if st.session_state.fleet_devices:
+        fleet_devices = st.session_state.fleet_devices
 
-    st.title(f"Управление устройством: {device.device_name}")
-    st.write(f"**IP-адрес:** {device.device_ip}")
-    st.write(f"**Статус:** {device.device_status}")
-    st.write(f"**Свободная память:** {device.sd_free_mem} GB")
+        st.title(f"Пакетный запуск: {len(fleet_devices)} устройств")
+        st.dataframe(
+            [{"Устройство": d.device_name, "IP-адрес": d.device_ip, "Статус": d.device_status,
+              "Свободная память, GB": d.sd_free_mem} for d in fleet_devices],
+            hide_index=True,
+            use_container_width=True,
+        )
 
-    st.session_state.test_params["device_name"] = device.device_name
-    st.session_state.test_params["device_ip"] = device.device_ip
+        # Имя и адрес подставляются для каждого устройства при отправке
+        st.session_state.test_params["device_name"] = ""
+        st.session_state.test_params["device_ip"] = ", ".join(d.device_ip for d in fleet_devices)
+    else:
+        device = st.session_state.selected_device
+
+        st.title(f"Управление устройством: {device.device_name}")
+        st.write(f"**IP-адрес:** {device.device_ip}")
+        st.write(f"**Статус:** {device.device_status}")
+        st.write(f"**Свободная память:** {device.sd_free_mem} GB")
+
+        st.session_state.test_params["device_name"] = device.device_name
+        st.session_state.test_params["device_ip"] = device.device_ip
+
+        show_sd_logs(device)
 
     st.markdown("---")
     st.subheader("Доступные действия")
@@ -203,9 +261,18 @@ if st.session_state.selected_device:
         col1, col2, col3 = st.columns(3)
         with col1:
             if st.button("Запустить все действия", type="primary"):
-                import pprint as pp
-                pp.pprint(st.session_state.test_params)
-                execute_device_action(st.session_state.test_params)
+                if st.session_state.fleet_devices:
+                    results = fleet.dispatch(st.session_state.fleet_devices, st.session_state.test_params)
+                    started = sum(result["Результат"] == "запущено" for result in results)
+                    if started == len(results):
+                        st.success(f"Очередь запущена на всех устройствах: {started}")
+                    else:
+                        st.error(f"Очередь запущена на {started} из {len(results)} устройств")
+                    st.dataframe(results, hide_index=True, use_container_width=True)
+                else:
+                    import pprint as pp
+                    pp.pprint(st.session_state.test_params)
+                    execute_device_action(st.session_state.test_params)
                 st.session_state.test_params["actions"] = []
         with col2:
             if st.button("Очистить очередь"):
@@ -214,22 +281,46 @@ if st.session_state.selected_device:
         with col3:
             if st.button("Вернуться к списку устройств"):
                 st.session_state.selected_device = None
+                st.session_state.fleet_devices = []
                 st.rerun()
     else:
         st.markdown("---")
         if st.button("Вернуться к списку устройств"):
             st.session_state.selected_device = None
+            st.session_state.fleet_devices = []
             st.rerun()
 
 else:
     st.title("Список доступных устройств")
 
+    registry = get_registry()
     if st.button("Обновить список устройств"):
-        st.rerun()
+        registry.refresh_now()
 
-    devices = get_device_list()
+    # Ждём только самый первый опрос после запуска процесса
+    if not registry.wait_ready(DEVICE_PROBE_TIMEOUT * 2):
+        st.info("Идёт поиск устройств...")
+    devices, probes = registry.snapshot()
+    if registry.last_error:
+        st.error(registry.last_error)
+    if registry.last_refresh:
+        st.caption(f"Данные обновлены {time.time() - registry.last_refresh:.0f} сек назад")
 
     if devices:
+        st.write("### Пакетный запуск")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            fleet_ips = st.multiselect(
+                "Устройства для одной очереди действий",
+                [device.device_ip for device in devices],
+                format_func=lambda ip: next(f"{d.device_name} ({ip})" for d in devices if d.device_ip == ip),
+            )
+        with col2:
+            st.write("")
+            if st.button("Управление выбранными", disabled=not fleet_ips):
+                st.session_state.fleet_devices = [device for device in devices if device.device_ip in fleet_ips]
+                st.rerun()
+
         st.write("### Список устройств")
         cols = st.columns([1, 2, 2, 2, 2])
         with cols[0]:
@@ -247,7 +338,12 @@ else:
             cols = st.columns([1, 2, 2, 2, 2])
             with cols[0]:
                 status_color = "green" if device.device_status.lower() == "online" else "red"
-                st.markdown(f"<span style='color:{status_color}'>{device.device_status}</span>", unsafe_allow_html=True)
+                latency = probes.get(device.device_ip, {}).get("latency_ms")
+                latency_text = f" ({latency:.0f} мс)" if latency is not None else ""
+                st.markdown(
+                    f"<span style='color:{status_color}'>{device.device_status}</span>{latency_text}",
+                    unsafe_allow_html=True,
+                )
             with cols[1]:
                 st.write(device.device_name)
             with cols[2]:
@@ -0,0 +1,93 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+import perf_view
+import telemetry
+from constants import DEVICE_PROBE_TIMEOUT, MONITOR_REFRESH_SECONDS
+from device_registry import get_registry
+from log_parser import TIME_COLUMN
+
+COLORS = ['blue', 'green', 'orange', 'purple', 'red', 'cyan', 'magenta']
+
+
+@st.fragment(run_every=MONITOR_REFRESH_SECONDS)
+def live_view(device_ip, columns):
+    """
+    Перерисовывается отдельно от страницы не чаще раза в MONITOR_REFRESH_SECONDS
+    и берёт из кольцевого буфера только прореженный снимок выбранных столбцов.
+    """
+    stream = telemetry.get_stream(device_ip)
+    buffer = stream.buffer
+
+    status = "подключено" if stream.connected else ("остановлено" if not stream.running else "подключение...")
+    st.caption(f"Поток: {status}, сессий: {stream.subscribers}. Отсчётов получено: {buffer.count}, в буфере: {min(buffer.count, buffer.capacity)}"
+               + (f", нераспознанных строк: {stream.bad_lines}" if stream.bad_lines else ""))
+    if stream.error:
+        st.warning(f"Ошибка потока: {stream.error}")
+
+    if buffer.latest:
+        shown = [key for key in buffer.latest if key != TIME_COLUMN][:6]
+        for col, key in zip(st.columns(len(shown)), shown):
+            col.metric(key, buffer.latest[key])
+
+    if not columns:
+        columns = [col for col in buffer.columns() if 'напряжение' in col.lower() or 'ток' in col.lower()]
+
+    df = telemetry.relative_time(buffer.snapshot(columns))
+    if df.empty or TIME_COLUMN not in df.columns:
+        st.info("Ожидание данных от устройства")
+        return
+
+    fig = go.Figure()
+    for idx, col in enumerate(c for c in columns if c in df.columns):
+        fig.add_trace(go.Scatter(
+            x=df[TIME_COLUMN].to_numpy(), y=df[col].to_numpy(), mode='lines', name=col,
+            line=dict(color=COLORS[idx % len(COLORS)], width=2),
+        ))
+    fig.update_layout(
+        xaxis_title="Время (сек)",
+        margin=dict(l=50, r=50, t=30, b=50),
+        plot_bgcolor='white',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        uirevision=device_ip,  # сохраняет масштаб графика между обновлениями
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='lightgray', tickformat="f")
+    fig.update_yaxes(showgrid=True, gridcolor='lightgray')
+    st.plotly_chart(fig, use_container_width=True)
+
+
+st.title("Мониторинг устройства")
+
+registry = get_registry()
+registry.wait_ready(DEVICE_PROBE_TIMEOUT * 2)
+devices, _ = registry.snapshot()
+
+device_names = {device.device_ip: device.device_name for device in devices}
+if device_names:
+    device_ip = st.selectbox(
+        "Устройство",
+        list(device_names),
+        format_func=lambda ip: f"{device_names[ip]} ({ip})",
+    )
+else:
+    device_ip = st.text_input("IP-адрес устройства", placeholder="127.0.0.1:8081").strip()
+
+if device_ip:
+    # Поток общий для сессий: кнопки подписывают и отписывают текущую сессию,
+    # и «Отключиться» не останавливает поток, который смотрят другие
+    stream = telemetry.get_stream(device_ip)
+    session = perf_view.session_id()
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Подключиться", type="primary", disabled=stream.subscribed(session)):
+            stream.subscribe(session)
+            st.rerun()
+    with col2:
+        if st.button("Отключиться", disabled=not stream.subscribed(session)):
+            stream.unsubscribe(session)
+            st.rerun()
+
+    numeric_columns = [col for col in stream.buffer.columns() if col != TIME_COLUMN]
+    columns = st.multiselect("Параметры на графике", numeric_columns, placeholder="Напряжения и токи")
+
+    live_view(device_ip, columns)
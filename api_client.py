@@ -0,0 +1,160 @@
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import perf
+from constants import (
+    API_CONNECT_TIMEOUT,
+    API_POOL_SIZE,
+    API_READ_TIMEOUT,
+    API_RETRIES,
+    API_RETRY_BACKOFF,
+    API_URL,
+    DEVICE_POLL_WORKERS,
+    DEVICE_POOL_HOSTS,
+)
+
+# Повторяем только идемпотентные запросы, POST может создать дубликат
+RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUSES = (502, 503, 504)
+
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+_sessions = {}
+_session_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _session(key, make_adapter):
+    session = _sessions.get(key)
+    if session is None:
+        with _session_lock:
+            session = _sessions.get(key)
+            if session is None:
+                adapter = make_adapter()
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _sessions[key] = session
+    return session
+
+
+def get_session(retry=True):
+    """
+    Возвращает общую для процесса сессию с пулом keep-alive соединений.
+    Сессия без повторов нужна для опросов, где важнее уложиться в таймаут.
+    """
+    def make_adapter():
+        max_retries = Retry(
+            total=API_RETRIES,
+            connect=API_RETRIES,
+            read=API_RETRIES,
+            status=API_RETRIES,
+            backoff_factor=API_RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        ) if retry else 0
+        return HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE, max_retries=max_retries)
+
+    return _session(retry, make_adapter)
+
+
+def get_probe_session():
+    """
+    Сессия без повторов для опроса устройств. У каждого устройства свой адрес,
+    а пулы соединений хранятся по хостам: в общей сессии на API_POOL_SIZE
+    хостов при опросе десятков устройств соединения закрывались бы каждый раунд.
+    """
+    return _session("probe", lambda: HTTPAdapter(
+        pool_connections=DEVICE_POOL_HOSTS, pool_maxsize=DEVICE_POLL_WORKERS, max_retries=0
+    ))
+
+
+def endpoint_name(method, path):
+    """
+    Имя эндпоинта для статистики: числовые сегменты пути заменяются на {id}.
+    """
+    path = ID_SEGMENT.sub("/{id}", path.split("?", 1)[0])
+    return f"{method} {path}"
+
+
+def _record(endpoint, elapsed, failed):
+    with _stats_lock:
+        entry = _stats.setdefault(endpoint, {"calls": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+        entry["calls"] += 1
+        entry["errors"] += int(failed)
+        entry["total_s"] += elapsed
+        entry["max_s"] = max(entry["max_s"], elapsed)
+
+
+def request(method, path, timeout=None, retry=True, session=None, **kwargs):
+    """
+    Выполняет запрос к API_URL + path через общую сессию (или session, если задана).
+    path может быть и полным URL (для устройств с собственным адресом).
+    """
+    url = path if path.startswith(("http://", "https://")) else f"{API_URL}{path}"
+    if timeout is None:
+        timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+    endpoint = endpoint_name(method, path)
+    started = time.perf_counter()
+    failed = True
+    nbytes = None
+    try:
+        response = (session or get_session(retry)).request(method, url, timeout=timeout, **kwargs)
+        failed = response.status_code >= 500
+        # Потоковые ответы не читаются заранее, их размер известен только из заголовка
+        length = response.headers.get("Content-Length")
+        nbytes = int(length) if length and length.isdigit() else None
+        return response
+    finally:
+        elapsed = time.perf_counter() - started
+        _record(endpoint, elapsed, failed)
+        perf.record(perf.STAGE_BACKEND, endpoint, elapsed, nbytes)
+
+
+def get(path, **kwargs):
+    return request("GET", path, **kwargs)
+
+
+def post(path, **kwargs):
+    return request("POST", path, **kwargs)
+
+
+def put(path, **kwargs):
+    return request("PUT", path, **kwargs)
+
+
+def delete(path, **kwargs):
+    return request("DELETE", path, **kwargs)
+
+
+def latency_stats():
+    """
+    Возвращает счётчики задержек по эндпоинтам, самые медленные по суммарному времени первыми.
+    """
+    with _stats_lock:
+        rows = [
+            {
+                "endpoint": endpoint,
+                "calls": entry["calls"],
+                "errors": entry["errors"],
+                "avg_ms": round(entry["total_s"] / entry["calls"] * 1000, 1),
+                "max_ms": round(entry["max_s"] * 1000, 1),
+                "total_ms": round(entry["total_s"] * 1000, 1),
+            }
+            for endpoint, entry in _stats.items()
+        ]
+    return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
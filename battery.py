@@ -1,24 +1,24 @@
 import streamlit as st
 import requests
-from constants import API_URL
 
-BAT_URL = f"{API_URL}/batteries/"
+import api_client
+import battery_cache
+
+BAT_PATH = "/batteries/"
 
 
 def fetch_batteries():
-    response = requests.get(BAT_URL)
-    if response.status_code == 200:
-        return response.json()
-    else:
+    try:
+        return battery_cache.get_batteries()
+    except requests.exceptions.HTTPError:
         st.error("Ошибка при получении данных аккумуляторов")
         return []
 
 
 def fetch_battery(battery_id):
-    response = requests.get(f"{BAT_URL}{battery_id}")
-    if response.status_code == 200:
-        return response.json()
-    else:
+    try:
+        return battery_cache.get_battery(battery_id)
+    except requests.exceptions.HTTPError:
         st.error("Аккумулятор не найден")
         return None
 
@@ -29,8 +29,9 @@ def create_battery(serial_number, capacity, comments):
         "capacity": capacity,
         "comments": comments
     }
-    response = requests.post(BAT_URL, json=data)
+    response = api_client.post(BAT_PATH, json=data)
     if response.status_code == 200:
+        battery_cache.on_created(response.json())
         st.success("Аккумулятор успешно добавлен!")
     elif response.status_code == 400:
         st.error("Ошибка: Серийный номер уже зарегистрирован.")
@@ -44,16 +45,18 @@ def update_battery(battery_id, serial_number, capacity, comments):
         "capacity": capacity,
         "comments": comments
     }
-    response = requests.put(f"{BAT_URL}{battery_id}", json=data)
+    response = api_client.put(f"{BAT_PATH}{battery_id}", json=data)
     if response.status_code == 200:
+        battery_cache.on_updated(response.json())
         st.success("Аккумулятор успешно обновлен!")
     else:
         st.error("Ошибка при обновлении аккумулятора")
 
 
 def delete_battery(battery_id):
-    response = requests.delete(f"{BAT_URL}{battery_id}")
+    response = api_client.delete(f"{BAT_PATH}{battery_id}")
     if response.status_code == 200:
+        battery_cache.on_deleted(battery_id)
         st.success("Аккумулятор успешно удален!")
     else:
         st.error("Ошибка при удалении аккумулятора")
@@ -0,0 +1,168 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cachetools import TTLCache
+
+import api_client
+from battery_index import BatteryIndex
+from constants import BATTERY_CACHE_SIZE, BATTERY_CACHE_TTL, BATTERY_INDEX_LOAD_ATTEMPTS, BATTERY_INDEX_TTL
+
+BAT_PATH = "/batteries/"
+
+# Размер страницы при загрузке всего каталога для индекса
+CATALOGUE_PAGE_SIZE = 1000
+
+# Общий для всех сессий процесса кэш ответов GET /batteries/.
+# Для страниц списка значение — список аккумуляторов и словарь {id: аккумулятор}.
+_cache = TTLCache(maxsize=BATTERY_CACHE_SIZE, ttl=BATTERY_CACHE_TTL)
+_lock = threading.Lock()
+
+# BatteryIndex по всему каталогу, время его загрузки и номер поколения,
+# который растёт с каждой записью: загрузка, начатая до записи, отбрасывается
+_index = None
+_index_loaded = 0.0
+_generation = 0
+_index_load_lock = threading.Lock()
+
+_prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="battery-prefetch")
+
+
+def get_batteries(skip=0, limit=100, serial_number=None):
+    """
+    Возвращает список аккумуляторов из кэша или с сервера.
+    serial_number передаётся серверу как фильтр по серийному номеру.
+    Список общий для всех сессий, изменять его нельзя.
+    """
+    key = ("list", skip, limit, serial_number or None)
+    with _lock:
+        entry = _cache.get(key)
+    if entry is not None:
+        return entry[0]
+
+    params = {"skip": skip, "limit": limit}
+    if serial_number:
+        params["serial_number"] = serial_number
+    response = api_client.get(BAT_PATH, params=params)
+    response.raise_for_status()
+    batteries = response.json()
+    with _lock:
+        _cache[key] = (batteries, {battery["id"]: battery for battery in batteries})
+    return batteries
+
+
+def prefetch_batteries(skip, limit, serial_number=None):
+    """
+    Загружает страницу списка в кэш в фоновом потоке.
+    """
+    def load():
+        try:
+            get_batteries(skip, limit, serial_number)
+        except Exception:
+            pass  # Ошибку покажет обычный запрос, если страница действительно понадобится
+
+    _prefetch_pool.submit(load)
+
+
+def iter_battery_pages(page_size=CATALOGUE_PAGE_SIZE):
+    """
+    Постранично обходит весь каталог на сервере, минуя кэш.
+    """
+    skip = 0
+    while True:
+        response = api_client.get(BAT_PATH, params={"skip": skip, "limit": page_size})
+        response.raise_for_status()
+        page = response.json()
+        if not page:
+            break
+        yield page
+        skip += len(page)
+
+
+def get_battery_index():
+    """
+    Возвращает индекс по всему каталогу, загружая его постранично при первом
+    обращении и раз в BATTERY_INDEX_TTL. Записи этого процесса обновляют индекс
+    на месте (см. on_created и др.). Если запись пришла во время загрузки,
+    загруженный каталог может её не содержать и загружается заново, но не
+    больше BATTERY_INDEX_LOAD_ATTEMPTS раз: при непрерывных записях (массовый
+    импорт) отдаётся последний загруженный индекс, и он считается свежим
+    только BATTERY_CACHE_TTL, как страницы списка.
+    """
+    global _index, _index_loaded
+    # Каталог загружает один поток, остальные ждут и получают его результат
+    with _index_load_lock:
+        for _ in range(BATTERY_INDEX_LOAD_ATTEMPTS):
+            with _lock:
+                if _index is not None and time.monotonic() - _index_loaded < BATTERY_INDEX_TTL:
+                    return _index
+                generation = _generation
+
+            index = BatteryIndex([battery for page in iter_battery_pages() for battery in page])
+            with _lock:
+                if _generation == generation:
+                    _index, _index_loaded = index, time.monotonic()
+                    return index
+        with _lock:
+            _index, _index_loaded = index, time.monotonic() - BATTERY_INDEX_TTL + BATTERY_CACHE_TTL
+        return index
+
+
+def get_battery(battery_id):
+    """
+    Возвращает аккумулятор по id. Сначала ищет в индексе и закэшированных списках,
+    затем в кэше отдельных записей и только потом запрашивает сервер.
+    """
+    with _lock:
+        battery = _index.get(battery_id) if _index is not None else None
+        if battery is not None:
+            return battery
+        for key, entry in list(_cache.items()):
+            if key[0] == "list" and battery_id in entry[1]:
+                return entry[1][battery_id]
+        battery = _cache.get(("detail", battery_id))
+    if battery is not None:
+        return battery
+
+    response = api_client.get(f"{BAT_PATH}{battery_id}")
+    response.raise_for_status()
+    battery = response.json()
+    with _lock:
+        _cache[("detail", battery_id)] = battery
+    return battery
+
+
+def invalidate():
+    """
+    Полностью сбрасывает кэш, когда результат записи неизвестен.
+    """
+    global _index, _generation
+    with _lock:
+        _cache.clear()
+        _index = None
+        _generation += 1
+
+
+def _apply(change):
+    """
+    Сбрасывает страницы списка и отдельные записи, а индекс каталога
+    обновляет точечно, чтобы не загружать его заново.
+    """
+    global _generation
+    with _lock:
+        _cache.clear()
+        _generation += 1
+        if _index is not None:
+            change(_index)
+
+
+def on_created(battery):
+    _apply(lambda index: index.add(battery))
+
+
+def on_updated(battery):
+    _apply(lambda index: index.update(battery))
+
+
+def on_deleted(battery_id):
+    _apply(lambda index: index.remove(battery_id))
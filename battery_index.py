@@ -0,0 +1,81 @@
+import threading
+from bisect import bisect_left, insort
+
+
+class BatteryIndex:
+    """
+    Индекс аккумуляторов по id и по префиксу серийного номера.
+
+    Строится один раз на загруженный список и обновляется точечно при создании,
+    изменении и удалении, поэтому поиск не требует прохода по всему списку.
+    Индекс общий для сессий процесса: изменения и поиск идут под блокировкой,
+    иначе поиск мог бы пройти по списку, который в этот момент сдвигает insort.
+    """
+
+    def __init__(self, batteries):
+        self.by_id = {battery["id"]: battery for battery in batteries}
+        self._serials = sorted(self._key(battery) for battery in batteries)
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(battery):
+        return battery["serial_number"].lower(), battery["id"]
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, battery_id):
+        with self._lock:
+            return self.by_id.get(battery_id)
+
+    def serials(self):
+        """
+        Возвращает множество серийных номеров в нижнем регистре.
+        """
+        with self._lock:
+            return {serial for serial, _ in self._serials}
+
+    def search(self, query, limit=20):
+        """
+        Возвращает не более limit аккумуляторов, чей серийный номер начинается с query.
+        Запрос вида "#123" или "123" также находит аккумулятор с этим id.
+        """
+        query = query.strip().lower()
+        found = []
+        battery_id = query.lstrip("#")
+        with self._lock:
+            if battery_id.isdigit() and int(battery_id) in self.by_id:
+                found.append(self.by_id[int(battery_id)])
+            if query.startswith("#"):
+                return found
+
+            pos = bisect_left(self._serials, (query, -1))
+            while len(found) < limit and pos < len(self._serials):
+                serial, battery_id = self._serials[pos]
+                if not serial.startswith(query):
+                    break
+                battery = self.by_id[battery_id]
+                if not found or found[0] is not battery:
+                    found.append(battery)
+                pos += 1
+        return found[:limit]
+
+    def add(self, battery):
+        with self._lock:
+            if battery["id"] in self.by_id:
+                self.remove(battery["id"])
+            self.by_id[battery["id"]] = battery
+            insort(self._serials, self._key(battery))
+
+    def update(self, battery):
+        self.add(battery)
+
+    def remove(self, battery_id):
+        with self._lock:
+            battery = self.by_id.pop(battery_id, None)
+            if battery is None:
+                return
+            key = self._key(battery)
+            pos = bisect_left(self._serials, key)
+            if pos < len(self._serials) and self._serials[pos] == key:
+                del self._serials[pos]
@@ -0,0 +1,277 @@
+"""
+Замер отрисовки страниц через AppTest с локальной заменой backend API
+(tools/fake_backend.py) в том же процессе.
+
+Каждый сценарий (страница и размер данных) выполняется в отдельном процессе
+с пустыми кэшами: замеряются первый показ и повторный rerun — время, число
+HTTP-запросов и переданные байты, а также пиковая память процесса страниц и
+фоновых процессов разбора. Результаты записываются в JSON, и прогоны можно
+сравнивать между собой.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_pages.py
+    python benchmarks/bench_pages.py --batteries 10 1000 10000 --lines 100000 1000000 10000000
+    python benchmarks/bench_pages.py --latency 50 --output before.json
+    python benchmarks/bench_pages.py --output after.json --baseline before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "tools"))
+
+BATTERY_PAGES = ["Batteries/view.py", "Batteries/edit.py", "Batteries/delete.py", "Batteries/add.py"]
+DEVICE_PAGES = ["Devices/devices.py"]
+LOG_PAGES = ["graphics.py"]
+PAGES = BATTERY_PAGES + DEVICE_PAGES + LOG_PAGES
+
+# Логи собираются из частей, чтобы генерация 10M строк не требовала гигабайтов памяти
+LOG_BLOCK_LINES = 1_000_000
+
+SCENARIO_TIMEOUT = 1800
+
+
+def graphics_script():
+    """
+    Страница "Parse file" с подменённым st.file_uploader: AppTest не умеет
+    загружать файлы, поэтому лог читается из BENCH_LOG.
+    """
+    import io
+    import os
+    import runpy
+
+    import streamlit as st
+
+    class UploadedLog(io.BytesIO):
+        def __init__(self, path):
+            with open(path, "rb") as f:
+                super().__init__(f.read())
+            self.name = os.path.basename(path)
+            self.file_id = self.name
+
+    if "bench_upload" not in st.session_state:
+        st.session_state.bench_upload = UploadedLog(os.environ["BENCH_LOG"])
+    st.file_uploader = lambda *args, **kwargs: st.session_state.bench_upload
+    runpy.run_path(os.environ["BENCH_PAGE"])
+
+
+def peak_rss_mb(pid="self"):
+    """
+    Пиковый RSS процесса по VmHWM. ru_maxrss не подходит: Linux переносит его
+    через fork и exec, и дочерний процесс унаследовал бы пик родителя.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def timed_run(at, server):
+    """
+    Один прогон страницы: время, число запросов и байты ответов backend.
+    """
+    server.reset_counters()
+    started = time.perf_counter()
+    at.run()
+    return time.perf_counter() - started, server.calls, server.bytes_sent
+
+
+def run_scenario(page, batteries, devices, latency, log_path):
+    """
+    Выполняется в дочернем процессе, рабочий каталог — временный, поэтому
+    кэши логов и экспорта пусты.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    import fake_backend
+    from constants import API_URL
+
+    server = fake_backend.start(urlparse(API_URL).port, batteries, devices, latency)
+    rss_before = peak_rss_mb()
+
+    if page in LOG_PAGES:
+        os.environ["BENCH_LOG"] = log_path
+        os.environ["BENCH_PAGE"] = os.path.join(ROOT, page)
+        at = AppTest.from_function(graphics_script, default_timeout=SCENARIO_TIMEOUT)
+    else:
+        at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=SCENARIO_TIMEOUT)
+
+    first_s, first_calls, first_bytes = timed_run(at, server)
+    if page in LOG_PAGES:
+        from jobs import get_pool, get_registry
+
+        # Первый показ лога заканчивается, когда фоновый разбор готов и графики построены
+        while not at.exception and not at.error and not at.get("plotly_chart"):
+            for job in get_registry().jobs():
+                job.future.exception()
+            elapsed, calls, sent = timed_run(at, server)
+            first_s, first_calls, first_bytes = first_s + elapsed, first_calls + calls, first_bytes + sent
+    rerun_s, rerun_calls, rerun_bytes = timed_run(at, server)
+
+    worker_rss = None
+    if page in LOG_PAGES:
+        pool = get_pool()
+        worker_rss = max((peak_rss_mb(pid) or 0 for pid in pool._processes), default=None)
+        pool.shutdown(wait=True)
+
+    server.shutdown()
+    peak_rss = peak_rss_mb()
+    return {
+        "first_s": round(first_s, 3),
+        "first_http_calls": first_calls,
+        "first_http_bytes": first_bytes,
+        "rerun_s": round(rerun_s, 3),
+        "rerun_http_calls": rerun_calls,
+        "rerun_http_bytes": rerun_bytes,
+        "peak_rss_mb": peak_rss,
+        "rss_growth_mb": round(peak_rss - rss_before, 1) if peak_rss is not None else None,
+        "worker_peak_rss_mb": worker_rss,
+        "errors": [str(e.value) for e in at.exception] + [str(e.value) for e in at.error],
+    }
+
+
+def write_log(path, n_lines):
+    from bench_parser import make_log
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for block, start in enumerate(range(0, n_lines, LOG_BLOCK_LINES)):
+            f.write(make_log(min(LOG_BLOCK_LINES, n_lines - start), seed=block, start=start))
+    os.replace(tmp_path, path)
+
+
+def log_file(log_dir, n_lines):
+    """
+    Синтетический лог из n_lines строк. Файл сохраняется в log_dir и
+    используется повторно, чтобы прогоны шли на одинаковых данных.
+    """
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, f"log-{n_lines}.txt")
+    if not os.path.exists(path):
+        print(f"Генерация лога на {n_lines} строк...", flush=True)
+        write_log(path, n_lines)
+    return path
+
+
+def spawn(scenario):
+    """
+    Запускает сценарий в отдельном процессе и возвращает его результат.
+    """
+    with tempfile.TemporaryDirectory(prefix="bench_pages_") as workdir:
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.path.join(ROOT, "benchmarks")]))
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--scenario", json.dumps(scenario)],
+            cwd=workdir, env=env, capture_output=True, text=True, timeout=SCENARIO_TIMEOUT,
+        )
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines() or ["неизвестная ошибка"]
+        return {"errors": [lines[-1]]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def scenarios(args):
+    for page in args.pages:
+        if page in LOG_PAGES:
+            # Каталог для записи ёмкости — наименьший, чтобы время зависело только от лога
+            for n_lines in args.lines:
+                yield {"page": page, "batteries": min(args.batteries), "devices": args.devices, "lines": n_lines}
+        elif page in DEVICE_PAGES:
+            yield {"page": page, "batteries": min(args.batteries), "devices": args.devices, "lines": None}
+        else:
+            for batteries in args.batteries:
+                yield {"page": page, "batteries": batteries, "devices": args.devices, "lines": None}
+
+
+def scenario_key(row):
+    return row["page"], row["batteries"], row["devices"], row["lines"], row["latency_ms"]
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(row, baseline):
+    size = f"{row['lines']} строк" if row["lines"] else f"{row['batteries']} акк."
+    if "first_s" not in row:
+        print(f"{row['page']:<22} {size:>16}  ошибка: {'; '.join(row['errors'])}")
+        return
+    change = ""
+    previous = baseline.get(scenario_key(row))
+    if previous and previous.get("first_s"):
+        change = f"{(row['first_s'] / previous['first_s'] - 1) * 100:+.0f}%"
+    print(
+        f"{row['page']:<22} {size:>16} {row['first_s']:9.2f} {change:>7} {row['rerun_s']:8.2f} "
+        f"{row['first_http_calls']:>7}/{row['rerun_http_calls']:<4} {row['peak_rss_mb'] or 0:9.0f} "
+        f"{row['worker_peak_rss_mb'] or '-':>9}"
+        + (f"  ошибки: {'; '.join(row['errors'])}" if row["errors"] else "")
+    )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", nargs="+", default=PAGES)
+    arg_parser.add_argument("--batteries", type=int, nargs="+", default=[10, 1000, 10000])
+    arg_parser.add_argument("--lines", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    arg_parser.add_argument("--devices", type=int, default=10, help="число устройств в списке backend")
+    arg_parser.add_argument("--latency", type=float, default=20.0, help="задержка каждого ответа backend, мс")
+    arg_parser.add_argument("--log-dir", default=os.path.join(tempfile.gettempdir(), "bench_pages_logs"))
+    arg_parser.add_argument("--output", help="файл результатов, по умолчанию .cache/bench/pages-<время>.json")
+    arg_parser.add_argument("--baseline", help="результаты прошлого прогона для сравнения")
+    arg_parser.add_argument("--scenario", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.scenario:
+        scenario = json.loads(args.scenario)
+        result = run_scenario(
+            scenario["page"], scenario["batteries"], scenario["devices"], scenario["latency"], scenario["log"]
+        )
+        print(json.dumps(result))
+        return
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = {scenario_key(row): row for row in json.load(f)["results"]}
+
+    print(f"{'страница':<22} {'данные':>16} {'первый, с':>9} {'Δ':>7} {'rerun, с':>8} {'HTTP':>12} "
+          f"{'RSS, MB':>9} {'разбор, MB':>9}")
+    results = []
+    for scenario in scenarios(args):
+        log_path = log_file(args.log_dir, scenario["lines"]) if scenario["lines"] else None
+        result = spawn({**scenario, "latency": args.latency / 1000, "log": log_path})
+        row = {**scenario, "latency_ms": args.latency, **result}
+        results.append(row)
+        print_row(row, baseline)
+
+    output = args.output or os.path.join(ROOT, ".cache", "bench", f"pages-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Результаты записаны в {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Сравнение векторного парсера log_parser.parse_log с построчным разбором
+через parse_data_line на синтетических логах.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_parser.py --lines 1000000 10000000
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_parser import memory_footprint, parse_data_line, parse_log  # noqa: E402
+
+
+def make_log(n_lines, seed=0, start=0):
+    """
+    Генерирует синтетический лог разрядки из n_lines строк. start — номер
+    первой строки, чтобы длинный лог можно было собрать из нескольких частей.
+    """
+    rng = np.random.default_rng(seed)
+    time_s = np.arange(start, start + n_lines) + 1_700_000_000
+    voltage = np.linspace(4200, 2750, n_lines) + rng.normal(0, 2, n_lines)
+    current = 300 + rng.normal(0, 1.5, n_lines)
+    temp = 25 + rng.normal(0, 0.3, n_lines)
+    status = np.where(np.arange(n_lines) < n_lines // 2, "CHARGE", "DISCHARGE")
+    frame = pd.DataFrame({
+        "time": time_s,
+        "temp_bat": temp.round(2),
+        "temp_env": (temp - 1).round(2),
+        "bat_voltage": voltage.round(1),
+        "bat_current": current.round(1),
+        "load_duty": rng.integers(0, 100, n_lines),
+        "charge_status": status,
+    })
+    lines = frame.columns[0] + "=" + frame[frame.columns[0]].astype(str)
+    for column in frame.columns[1:]:
+        lines = lines + " " + column + "=" + frame[column].astype(str)
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def run_legacy(data):
+    lines = [line.decode("utf-8").strip() for line in io.BytesIO(data).readlines()]
+    return pd.DataFrame([parse_data_line(line) for line in lines])
+
+
+def run_vectorized(data):
+    return parse_log(io.BytesIO(data))
+
+
+def measure(func, data):
+    started = time.perf_counter()
+    df = func(data)
+    return time.perf_counter() - started, df
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--lines", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    arg_parser.add_argument(
+        "--legacy-max", type=int, default=10_000_000,
+        help="не запускать построчный разбор на файлах длиннее этого числа строк",
+    )
+    args = arg_parser.parse_args()
+
+    print(f"{'строк':>12} {'MB':>8} {'legacy, с':>10} {'vector, с':>10} {'ускорение':>10} {'RAM legacy/vector, MB':>22}")
+    for n_lines in args.lines:
+        data = make_log(n_lines)
+        vector_time, vector_df = measure(run_vectorized, data)
+        vector_mem, wide_mem = (size / 2**20 for size in memory_footprint(vector_df))
+
+        if n_lines <= args.legacy_max:
+            legacy_time, legacy_df = measure(run_legacy, data)
+            legacy_mem = legacy_df.memory_usage(deep=True).sum() / 2**20
+            speedup = f"{legacy_time / vector_time:9.1f}x"
+            legacy_cell = f"{legacy_time:10.2f}"
+            mem_cell = f"{legacy_mem:.0f}/{vector_mem:.0f}"
+            del legacy_df
+        else:
+            speedup, legacy_cell, mem_cell = f"{'-':>10}", f"{'-':>10}", f"~{wide_mem:.0f}/{vector_mem:.0f}"
+
+        print(f"{n_lines:>12} {len(data) / 2**20:8.1f} {legacy_cell} {vector_time:10.2f} {speedup} {mem_cell:>22}")
+        del vector_df, data
+
+
+if __name__ == "__main__":
+    main()
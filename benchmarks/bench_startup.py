@@ -0,0 +1,119 @@
+"""
+Холодный запуск страниц: для каждой страницы в отдельном процессе Python
+замеряется время импорта её зависимостей (по -X importtime, без самого
+Streamlit) и время первой отрисовки через AppTest.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --pages graphics.py Devices/devices.py
+
+main.py замеряется отдельно: до метки выполняются запрос к локальной замене
+backend и пустая фоновая задача, чтобы боковая колонка рисовала таблицы
+задержек API и задач. AppTest не выполняет страницы из st.navigation, поэтому
+в замер main.py входит только общая для всех страниц часть, и тяжёлые
+библиотеки в нём означают, что их тянет боковая колонка.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAIN = "main.py"
+
+PAGES = [
+    MAIN,
+    "Devices/devices.py",
+    "Devices/monitor.py",
+    "Batteries/view.py",
+    "Batteries/add.py",
+    "Batteries/edit.py",
+    "Batteries/delete.py",
+    "Batteries/bulk.py",
+    "graphics.py",
+    "compare.py",
+]
+
+HEAVY_MODULES = {"pandas", "numpy", "pyarrow", "plotly", "pydantic"}
+
+MARKER = "--- page start ---"
+
+# Выполняется в дочернем процессе: Streamlit импортируется до метки и в замер не входит
+CHILD = f"""
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write({MARKER!r} + "\\n")
+started = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60)
+at.run()
+print(time.perf_counter() - started)
+"""
+
+# Подготовка для main.py: непустые таблицы в боковой колонке
+MAIN_SETUP = """
+import os, sys
+sys.path.insert(0, os.path.join(os.getcwd(), "tools"))
+import api_client, fake_backend, jobs
+server = fake_backend.start(0)
+api_client.API_URL = f"http://127.0.0.1:{server.server_port}"
+api_client.get("/batteries/").raise_for_status()
+jobs.get_registry().submit(("bench",), "Пустая задача", len).result()
+"""
+
+IMPORT_LINE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)")
+
+
+def measure(page):
+    """
+    Возвращает (время импорта, время отрисовки) в секундах и список тяжёлых
+    библиотек, загруженных страницей.
+    """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    child = MAIN_SETUP + CHILD if page == MAIN else CHILD
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", child, page],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=300,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = float(result.stdout.strip().splitlines()[-1])
+
+    import_us = 0
+    heavy = set()
+    after_marker = False
+    for line in result.stderr.splitlines():
+        if line.strip() == MARKER:
+            after_marker = True
+            continue
+        match = IMPORT_LINE.match(line)
+        if not after_marker or not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # Внешние импорты имеют отступ в один пробел, вложенные входят в их cumulative
+        if len(indent) == 1:
+            import_us += cumulative
+        if name.split(".")[0] in HEAVY_MODULES:
+            heavy.add(name.split(".")[0])
+    import_time = import_us / 1e6
+    return import_time, max(total - import_time, 0.0), sorted(heavy)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--pages", nargs="+", default=PAGES)
+    args = arg_parser.parse_args()
+
+    print(f"{'страница':<22} {'импорт, с':>10} {'отрисовка, с':>13}  тяжёлые библиотеки")
+    for page in args.pages:
+        try:
+            import_time, render_time, heavy = measure(page)
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f"{page:<22} ошибка: {e}")
+            continue
+        print(f"{page:<22} {import_time:10.2f} {render_time:13.2f}  {', '.join(heavy) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+import job_view
+import startup
+from constants import LOG_FILE_TYPES
+
+ALIGNMENTS = {
+    "time": "Время от начала (сек)",
+    "charge": "Отданный заряд (мА·ч)",
+}
+
+CHARGE_COLUMN = "Отданный заряд, мА·ч"
+
+# Суммарное число точек на графике, делится между всеми файлами
+TOTAL_POINTS = 20000
+
+
+def unique_names(names):
+    """
+    Подписи файлов для легенды и сводки: одинаковые имена нумеруются
+    ("log.txt", "log.txt (2)").
+    """
+    seen = {}
+    result = []
+    for name in names:
+        seen[name] = seen.get(name, 0) + 1
+        result.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    return result
+
+
+def summarize(name, df):
+    from log_parser import TIME_COLUMN
+    from metrics import CURRENT_COLUMN, VOLTAGE_COLUMN
+
+    row = {
+        "Файл": name,
+        "Строк": len(df),
+        "Длительность, сек": float(df[TIME_COLUMN].iloc[-1]) if len(df) else 0.0,
+    }
+    if VOLTAGE_COLUMN in df.columns:
+        row["Напряжение min, mV"] = float(df[VOLTAGE_COLUMN].min())
+        row["Напряжение max, mV"] = float(df[VOLTAGE_COLUMN].max())
+    if CURRENT_COLUMN in df.columns:
+        row["Средний ток, mA"] = float(df[CURRENT_COLUMN].abs().mean())
+    if CHARGE_COLUMN in df.columns:
+        row[CHARGE_COLUMN] = float(df[CHARGE_COLUMN].iloc[-1]) if len(df) else 0.0
+    return row
+
+
+def main():
+    st.title("Сравнение файлов")
+
+    startup.warm("Парсер логов", startup.warm_parser)
+    uploaded_files = st.file_uploader("Выберите файлы", type=LOG_FILE_TYPES, accept_multiple_files=True)
+
+    if not uploaded_files:
+        st.info("Пожалуйста, загрузите один или несколько файлов.")
+        return
+
+    # pandas и pyarrow загружаются только после выбора файлов,
+    # и не раньше, чем их догрузит прогрев парсера
+    startup.wait("Парсер логов")
+    from decimation import DEFAULT_POINTS, decimate
+    from log_cache import file_digest, load_log_async
+    from log_parser import TIME_COLUMN
+    from metrics import CURRENT_COLUMN, STATUS_COLUMN, VOLTAGE_COLUMN, discharged_charge
+
+    digests = st.session_state.setdefault("log_digests", {})
+    for uploaded_file in uploaded_files:
+        if uploaded_file.file_id not in digests:
+            digests[uploaded_file.file_id] = file_digest(uploaded_file)
+
+    # Недостающие в кэше файлы разбираются параллельно в фоновых процессах
+    frames, running = [], []
+    for uploaded_file in uploaded_files:
+        df, job = load_log_async(uploaded_file, digests[uploaded_file.file_id], f"Разбор {uploaded_file.name}")
+        if job is None:
+            frames.append(df)
+        elif job.error:
+            job_view.show_failed(job)
+        else:
+            running.append(job)
+    if running:
+        job_view.wait_for(running)
+        return
+    if len(frames) < len(uploaded_files):
+        return
+
+    # Ключ — подпись, а не имя файла: файлы с одинаковыми именами не заменяют друг друга
+    logs = {}
+    names = unique_names(uploaded_file.name for uploaded_file in uploaded_files)
+    for uploaded_file, name, df in zip(uploaded_files, names, frames):
+        if df.attrs.get("bad_lines"):
+            st.warning(f"Файл {uploaded_file.name}: пропущено строк с ошибками: {df.attrs['bad_lines']}.")
+        if df.empty or TIME_COLUMN not in df.columns:
+            st.warning(f"Файл {uploaded_file.name} пуст или не содержит столбец '{TIME_COLUMN}', пропущен.")
+            continue
+        if {CURRENT_COLUMN, STATUS_COLUMN} <= set(df.columns):
+            df[CHARGE_COLUMN] = discharged_charge(df)
+        logs[name] = df
+
+    if not logs:
+        return
+
+    common_columns = set.intersection(*(set(df.select_dtypes(include=['number']).columns) for df in logs.values()))
+    y_options = [col for col in next(iter(logs.values())).columns
+                 if col in common_columns and col not in (TIME_COLUMN, CHARGE_COLUMN)]
+    if not y_options:
+        st.error("У файлов нет общих числовых параметров.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        y_col = st.selectbox(
+            "Параметр", y_options, index=y_options.index(VOLTAGE_COLUMN) if VOLTAGE_COLUMN in y_options else 0
+        )
+    with col2:
+        alignments = [key for key in ALIGNMENTS if key == "time" or CHARGE_COLUMN in common_columns]
+        alignment = st.radio("Ось X", alignments, format_func=lambda key: ALIGNMENTS[key], horizontal=True)
+    x_col = TIME_COLUMN if alignment == "time" else CHARGE_COLUMN
+
+    n_points = min(DEFAULT_POINTS, max(TOTAL_POINTS // len(logs), 200))
+    fig = go.Figure()
+    for name, df in logs.items():
+        x, y = decimate(df[x_col].to_numpy(), df[y_col].to_numpy(), n_points)
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines', name=name, line=dict(width=2)))
+    fig.update_layout(
+        title=f"{y_col}: сравнение {len(logs)} файлов",
+        xaxis_title=ALIGNMENTS[alignment],
+        yaxis_title=y_col,
+        template="plotly",
+        margin=dict(l=50, r=50, t=50, b=50),
+        plot_bgcolor='white',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    fig.update_xaxes(showgrid=True, gridcolor='lightgray', linecolor='black', mirror=True, tickformat="f")
+    fig.update_yaxes(showgrid=True, gridcolor='lightgray', linecolor='black', mirror=True)
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.subheader("Сводка")
+    st.dataframe([summarize(name, df) for name, df in logs.items()], hide_index=True, use_container_width=True)
+
+
+main()
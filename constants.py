@@ -1 +1,84 @@
-API_URL = "http://localhost:21216"
\ No newline at end of file
+API_URL = "http://localhost:21216"
+
+# Кэш разобранных логов для страницы "Parse file"
+LOG_CACHE_DIR = ".cache/logs"
+LOG_CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Сколько первых строк лога показывать, пока идёт разбор
+LOG_PREVIEW_ROWS = 200
+
+# Параметры HTTP-клиента backend API
+API_CONNECT_TIMEOUT = 3.05
+API_READ_TIMEOUT = 15
+API_RETRIES = 3
+API_RETRY_BACKOFF = 0.3
+API_POOL_SIZE = 10
+
+# Кэш ответов GET /batteries/
+BATTERY_CACHE_TTL = 5
+BATTERY_CACHE_SIZE = 64
+# Индекс всего каталога обновляется записями этого процесса, а заново загружается
+# только для изменений от других клиентов (сек)
+BATTERY_INDEX_TTL = 600
+# Сколько раз загружать каталог заново, если во время загрузки были записи
+BATTERY_INDEX_LOAD_ATTEMPTS = 3
+
+# Массовый импорт аккумуляторов
+BULK_IMPORT_WORKERS = 8
+BULK_IMPORT_BATCH_SIZE = 50
+
+# Фоновый опрос устройств
+DEVICE_POLL_INTERVAL = 5
+DEVICE_PROBE_PATH = "/status"
+DEVICE_PROBE_TIMEOUT = 2
+DEVICE_POLL_WORKERS = 16
+# Для скольких устройств держать keep-alive соединения опроса
+DEVICE_POOL_HOSTS = 256
+
+# Живой мониторинг телеметрии
+DEVICE_TELEMETRY_PATH = "/telemetry"
+MONITOR_BUFFER_SIZE = 100000
+MONITOR_READ_TIMEOUT = 120
+# Наибольший блок, который читается из потока за раз; строки отдаются сразу, как пришли
+MONITOR_READ_CHUNK = 64 * 1024
+MONITOR_REFRESH_SECONDS = 1.0
+
+# Пакетный запуск очереди действий на нескольких устройствах
+FLEET_DISPATCH_WORKERS = 8
+FLEET_DISPATCH_TIMEOUT = 10
+
+# Число процессов для фоновых задач: разбор логов, экспорт
+PARSE_WORKERS = 4
+
+# Внутреннее сопротивление: минимальная ступенька тока (мА) и наибольший шаг между отсчётами (сек)
+IR_MIN_CURRENT_STEP = 100
+IR_MAX_STEP_SECONDS = 2
+
+# Сколько готовых графиков держать в памяти процесса
+FIGURE_CACHE_SIZE = 256
+
+# Фоновые задачи: как часто страница проверяет ход работы и сколько хранить завершённые (сек)
+JOB_POLL_SECONDS = 0.5
+JOB_RETENTION_SECONDS = 600
+
+# Экспорт разобранных логов: каталог готовых файлов, его предельный размер и строк в пакете записи
+EXPORT_DIR = ".cache/exports"
+EXPORT_MAX_BYTES = 2 * 1024 ** 3
+EXPORT_BATCH_ROWS = 256 * 1024
+
+# Панель замеров производительности: включается параметром адреса ?perf=1 или переменной окружения.
+# Если задана переменная PERF_LOG_ENV_VAR, каждый rerun дописывается в указанный файл в формате JSON Lines
+PERF_QUERY_PARAM = "perf"
+PERF_ENV_VAR = "PERF_PANEL"
+PERF_LOG_ENV_VAR = "PERF_LOG"
+PERF_HISTORY_SIZE = 500
+
+# Логи с SD-карты устройств: путь списка файлов на устройстве, каталог локальных копий и его предельный размер,
+# блок чтения при загрузке и число попыток докачки подряд без новых данных
+DEVICE_SD_FILES_PATH = "/sd/files"
+DEVICE_LOG_DIR = ".cache/device_logs"
+DEVICE_LOG_MAX_BYTES = 4 * 1024 ** 3
+DEVICE_DOWNLOAD_CHUNK = 1024 * 1024
+DEVICE_DOWNLOAD_RETRIES = 5
+
+# Расширения файлов логов, которые принимают страницы разбора: текст, двоичный формат и их сжатые варианты
+LOG_FILE_TYPES = ["txt", "log", "bin", "gz", "zst"]
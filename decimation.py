@@ -0,0 +1,79 @@
+import numpy as np
+
+MODES = {
+    "lttb": "LTTB",
+    "minmax": "min/max",
+}
+
+# Количество точек на одну линию графика по умолчанию
+DEFAULT_POINTS = 2000
+
+
+def minmax_indices(y, n_out):
+    """
+    Делит ряд на n_out // 2 равных корзин и оставляет в каждой индексы минимума и максимума.
+    Сохраняет все пики, поэтому подходит для шумных сигналов.
+    """
+    n = len(y)
+    n_buckets = max(n_out // 2, 1)
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(n_buckets, size)
+
+    nan = np.isnan(padded)
+    offsets = np.arange(n_buckets) * size
+    lows = np.argmin(np.where(nan, np.inf, padded), axis=1) + offsets
+    highs = np.argmax(np.where(nan, -np.inf, padded), axis=1) + offsets
+    indices = np.unique(np.concatenate(([0, n - 1], lows, highs)))
+    return indices[indices < n]
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: в каждой корзине выбирается точка, образующая
+    треугольник наибольшей площади с точкой предыдущей корзины и средним следующей.
+    """
+    n = len(y)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    y_filled = np.where(np.isnan(y), 0.0, y)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean() if next_hi > next_lo else x[n - 1]
+        avg_y = y_filled[next_lo:next_hi].mean() if next_hi > next_lo else y_filled[n - 1]
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y_filled[lo:hi] - y_filled[prev])
+            - (x[prev] - x[lo:hi]) * (avg_y - y_filled[prev])
+        )
+        prev = lo + int(np.argmax(area)) if hi > lo else lo
+        indices[i + 1] = prev
+    return np.unique(indices)
+
+
+def decimate(x, y, n_points=DEFAULT_POINTS, mode="lttb"):
+    """
+    Возвращает прореженные x и y не длиннее n_points точек.
+    Нечисловые ряды и ряды короче n_points возвращаются без изменений.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= n_points or y.dtype.kind not in "biuf" or x.dtype.kind not in "biuf":
+        return x, y
+
+    y_float = y.astype(np.float64)
+    if mode == "minmax":
+        indices = minmax_indices(y_float, n_points)
+    else:
+        indices = lttb_indices(x.astype(np.float64), y_float, n_points)
+    return x[indices], y[indices]
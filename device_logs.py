@@ -0,0 +1,214 @@
+"""
+Логи с SD-карты устройств: список файлов, потоковая загрузка с докачкой
+и локальные копии по устройству и имени файла.
+
+Лог не загружается в память целиком: RemoteLog читается парсером блоками
+прямо из HTTP-ответа, а прочитанные байты сразу дописываются в локальную
+копию. После обрыва связи чтение продолжается запросом Range с того же
+места, а прерванная загрузка продолжается с конца частичной копии.
+"""
+import hashlib
+import os
+import re
+import time
+
+import requests
+import urllib3
+
+import api_client
+from constants import (
+    DEVICE_DOWNLOAD_CHUNK,
+    DEVICE_DOWNLOAD_RETRIES,
+    DEVICE_LOG_DIR,
+    DEVICE_LOG_MAX_BYTES,
+    DEVICE_PROBE_TIMEOUT,
+    DEVICE_SD_FILES_PATH,
+)
+
+LOG_SUFFIX = ".log"
+PART_SUFFIX = ".part"
+
+UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+# Ошибки, после которых загрузку можно продолжить с места обрыва
+TRANSFER_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+
+def list_logs(device_ip):
+    """
+    Список логов на SD-карте устройства: словари name, size, mtime, новые первыми.
+    """
+    response = api_client.get(
+        f"http://{device_ip}{DEVICE_SD_FILES_PATH}", timeout=(DEVICE_PROBE_TIMEOUT, DEVICE_PROBE_TIMEOUT * 5)
+    )
+    response.raise_for_status()
+    return sorted(response.json(), key=lambda entry: entry["mtime"], reverse=True)
+
+
+def log_url(device_ip, name):
+    return f"http://{device_ip}{DEVICE_SD_FILES_PATH}/{requests.utils.quote(name, safe='')}"
+
+
+def local_path(device_ip, entry):
+    """
+    Путь локальной копии. Время изменения входит в имя, поэтому перезаписанный
+    на карте файл загружается заново, а старая копия уходит при вытеснении.
+    """
+    name = f"{device_ip}--{entry['name']}--{int(entry['mtime'])}"
+    return os.path.join(DEVICE_LOG_DIR, UNSAFE_CHARS.sub("_", name) + LOG_SUFFIX)
+
+
+def log_digest(device_ip, entry):
+    """
+    Ключ разобранного лога в log_cache: устройство, имя, размер и время изменения.
+    """
+    key = f"device:{device_ip}/{entry['name']}/{entry['size']}/{int(entry['mtime'])}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class RemoteLog:
+    """
+    Файл с SD-карты, читаемый через read() как обычный файл. Если лог уже
+    загружен, читается локальная копия; если загрузка была прервана, сначала
+    читается частичная копия, затем недостающая часть с устройства.
+    """
+
+    def __init__(self, device_ip, entry):
+        self.url = log_url(device_ip, entry["name"])
+        self.size = entry["size"]
+        self.path = local_path(device_ip, entry)
+        self.part_path = self.path + PART_SUFFIX
+        self.position = 0
+        # Сколько байт прочитано из локальной копии, а не загружено
+        self.reused = 0
+        self._response = None
+        self._part = None
+
+        os.makedirs(DEVICE_LOG_DIR, exist_ok=True)
+        if os.path.exists(self.path):
+            os.utime(self.path)
+            self._local = open(self.path, "rb")
+            self.reused = self.size
+        else:
+            self._local = open(self.part_path, "rb") if os.path.exists(self.part_path) else None
+            self._part = open(self.part_path, "ab")
+            # Частичная копия тоже вытесняется по времени изменения (см. _complete),
+            # докачиваемая не должна оказаться самой старой
+            os.utime(self.part_path)
+            self.reused = self._part.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.size
+        out = bytearray()
+        while len(out) < size and self.position < self.size:
+            if self._local is not None:
+                data = self._local.read(size - len(out))
+                if not data:
+                    self._local.close()
+                    self._local = None
+                    continue
+            else:
+                data = self._download(min(size - len(out), DEVICE_DOWNLOAD_CHUNK))
+                self._part.write(data)
+            out += data
+            self.position += len(data)
+        if self.position >= self.size and self._part is not None:
+            self._complete()
+        return bytes(out)
+
+    def _connect(self):
+        response = api_client.get(
+            self.url, headers={"Range": f"bytes={self.position}-"}, stream=True,
+            timeout=(DEVICE_PROBE_TIMEOUT, DEVICE_PROBE_TIMEOUT * 5),
+        )
+        response.raise_for_status()
+        if self.position and response.status_code != 206:
+            response.close()
+            raise RuntimeError("Устройство не поддерживает докачку (Range)")
+        return response
+
+    def _download(self, size):
+        """
+        Читает следующие байты с устройства, переподключаясь с текущего места
+        при обрыве. Счётчик попыток сбрасывается, как только данные пошли.
+        """
+        attempts = 0
+        while True:
+            try:
+                if self._response is None:
+                    self._response = self._connect()
+                # read1 отдаёт то, что уже пришло: read при обрыве потерял бы прочитанное
+                data = self._response.raw.read1(size, decode_content=True)
+                if data:
+                    return data
+                raise urllib3.exceptions.ProtocolError("Соединение закрыто до конца файла")
+            except TRANSFER_ERRORS:
+                self._close_response()
+                attempts += 1
+                if attempts > DEVICE_DOWNLOAD_RETRIES:
+                    raise
+                time.sleep(min(2 ** attempts * 0.1, 5))
+
+    def _complete(self):
+        self._close_response()
+        self._part.close()
+        self._part = None
+        os.replace(self.part_path, self.path)
+        from log_cache import evict
+
+        # Брошенные частичные копии (упавшие задачи, перезаписанные на карте файлы)
+        # вытесняются вместе с готовыми
+        evict(DEVICE_LOG_DIR, DEVICE_LOG_MAX_BYTES, (LOG_SUFFIX, LOG_SUFFIX + PART_SUFFIX))
+
+    def _close_response(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+    def close(self):
+        self._close_response()
+        for f in (self._local, self._part):
+            if f is not None:
+                f.close()
+        self._local = self._part = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def fetch_job(device_ip, entry, digest, progress):
+    """
+    Фоновая задача (см. jobs): загружает лог с устройства и одновременно
+    разбирает его, результат кладёт в кэш разобранных логов.
+    """
+    from log_cache import get_cache, report_partial
+    from log_parser import parse_log
+
+    with RemoteLog(device_ip, entry) as remote:
+        def report(stats):
+            downloaded = max(stats["bytes"] - remote.reused, 0)
+            progress.update(
+                fraction=stats["bytes"] / max(remote.size, 1),
+                text=f"Загружено {downloaded / 2**20:.1f} МБ из {(remote.size - remote.reused) / 2**20:.1f} МБ, "
+                     f"разобрано строк: {stats['lines']}",
+            )
+            report_partial(progress, stats)
+
+        df = parse_log(remote, progress=report)
+    if not df.empty and get_cache().put(digest, df):
+        return None
+    return df
+
+
+def load_device_log_async(device_ip, entry, title, window=None):
+    """
+    Не блокирующая загрузка лога с устройства через кэш (см. log_cache.load_async).
+    """
+    from log_cache import load_async
+
+    digest = log_digest(device_ip, entry)
+    return load_async(digest, title, lambda: (fetch_job, device_ip, entry, digest), window)
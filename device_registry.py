@@ -0,0 +1,140 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from pydantic import BaseModel
+
+import api_client
+from constants import DEVICE_POLL_INTERVAL, DEVICE_POLL_WORKERS, DEVICE_PROBE_PATH, DEVICE_PROBE_TIMEOUT
+
+
+class DeviceAnnounce(BaseModel):
+    device_status: str
+    device_name: str
+    device_ip: str
+    sd_free_mem: int
+
+
+class DeviceRegistry:
+    """
+    Реестр устройств в памяти процесса, который обновляется фоновым потоком.
+
+    Список устройств берётся у агрегатора (/get_device_list), после чего каждое
+    устройство параллельно опрашивается напрямую с отдельным таймаутом. Страница
+    читает реестр и не ждёт сети.
+    """
+
+    def __init__(self, interval=DEVICE_POLL_INTERVAL, probe_path=DEVICE_PROBE_PATH,
+                 probe_timeout=DEVICE_PROBE_TIMEOUT, workers=DEVICE_POLL_WORKERS):
+        self.interval = interval
+        self.probe_path = probe_path
+        self.probe_timeout = probe_timeout
+        self.devices = {}
+        self.probes = {}
+        self.last_refresh = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._ready = threading.Event()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="device-probe")
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="device-registry", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:  # Поток не должен умирать из-за одного неудачного опроса
+                with self._lock:
+                    self.last_error = f"Ошибка опроса устройств: {e}"
+                self._ready.set()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def refresh_now(self):
+        """
+        Просит фоновый поток обновить реестр, не дожидаясь интервала.
+        """
+        self._wake.set()
+
+    def wait_ready(self, timeout):
+        return self._ready.wait(timeout)
+
+    def _probe(self, device):
+        """
+        Опрашивает устройство напрямую. Поля из ответа устройства заменяют
+        данные агрегатора. Offline устройство считается, только если к нему не
+        удалось подключиться; при ошибке HTTP (например, 404 у стенда без
+        /status) или непонятном ответе остаются данные агрегатора.
+        """
+        started = time.perf_counter()
+        try:
+            response = api_client.get(
+                f"http://{device.device_ip}{self.probe_path}",
+                timeout=self.probe_timeout,
+                session=api_client.get_probe_session(),
+            )
+            response.raise_for_status()
+            status = response.json()
+            probe = {"latency_ms": round((time.perf_counter() - started) * 1000, 1), "error": None}
+            fields = {key: status[key] for key in ("device_status", "sd_free_mem") if key in status}
+            fields.setdefault("device_status", "online")
+        except requests.exceptions.ConnectionError as e:  # в том числе ConnectTimeout
+            probe = {"latency_ms": None, "error": str(e)}
+            fields = {"device_status": "offline"}
+        except (requests.exceptions.RequestException, ValueError) as e:
+            probe = {"latency_ms": None, "error": str(e)}
+            fields = {}
+        return device.model_copy(update=fields), probe
+
+    def refresh(self):
+        try:
+            response = api_client.get("/get_device_list", timeout=(self.probe_timeout, self.probe_timeout))
+            response.raise_for_status()
+            announced = [DeviceAnnounce(**device) for device in response.json()]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            with self._lock:
+                self.last_error = f"Ошибка при получении списка устройств: {e}"
+            self._ready.set()
+            return
+
+        if self.probe_path:
+            results = list(self._pool.map(self._probe, announced))
+        else:
+            results = [(device, {"latency_ms": None, "error": None}) for device in announced]
+
+        with self._lock:
+            self.devices = {device.device_ip: device for device, _ in results}
+            self.probes = {device.device_ip: probe for device, probe in results}
+            self.last_refresh = time.time()
+            self.last_error = None
+        self._ready.set()
+
+    def snapshot(self):
+        """
+        Возвращает текущий список устройств и данные последнего опроса по IP.
+        """
+        with self._lock:
+            return list(self.devices.values()), dict(self.probes)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    Возвращает общий для процесса реестр и запускает его фоновый поток.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+            _registry.start()
+    return _registry
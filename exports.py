@@ -0,0 +1,170 @@
+"""
+Экспорт разобранных логов в Parquet, CSV (gzip) и HTML-отчёт.
+
+Экспорт строится из кэша разобранных логов (Feather в memory map), а не из
+исходного текста, и записывается пакетами по EXPORT_BATCH_ROWS строк, поэтому
+время работы определяется вводом-выводом. Готовые файлы сохраняются в
+EXPORT_DIR и при повторном запросе отдаются сразу.
+"""
+import hashlib
+import html
+import json
+import os
+import uuid
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+import figures
+import metrics
+from constants import EXPORT_BATCH_ROWS, EXPORT_DIR, EXPORT_MAX_BYTES
+from log_cache import ATTRS_KEY, CACHE_VERSION, evict, get_cache
+from log_parser import TIME_COLUMN
+
+# Формат: название, расширение файла, MIME-тип
+EXPORT_FORMATS = {
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "csv": ("CSV (gzip)", "csv.gz", "application/gzip"),
+    "html": ("HTML-отчёт", "html", "text/html"),
+}
+
+SUFFIXES = tuple(f".{extension}" for _, extension, _ in EXPORT_FORMATS.values())
+
+
+def export_path(digest, window, fmt, n_points, mode):
+    """
+    Путь готового файла. Окно входит в имя хэшем точных значений границ:
+    округлённые границы совпали бы у разных окон.
+    """
+    key = (float(window[0]), float(window[1]))
+    if fmt == "html":
+        # Отчёт содержит прореженные графики, поэтому зависит и от прореживания
+        key += (int(n_points), mode)
+    name = f"{digest}-v{CACHE_VERSION}-{hashlib.sha256(repr(key).encode('utf-8')).hexdigest()[:16]}"
+    return os.path.join(EXPORT_DIR, f"{name}.{EXPORT_FORMATS[fmt][1]}")
+
+
+def _to_table(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table.replace_schema_metadata({**table.schema.metadata, ATTRS_KEY: json.dumps(df.attrs)})
+
+
+def _write_batches(table, writer, progress):
+    written = 0
+    for batch in table.to_batches(max_chunksize=EXPORT_BATCH_ROWS):
+        writer.write_batch(batch)
+        written += batch.num_rows
+        progress.update(fraction=written / max(table.num_rows, 1), text=f"Записано строк: {written}")
+
+
+def write_parquet(df, path, progress, n_points, mode):
+    table = _to_table(df)
+    with pq.ParquetWriter(path, table.schema, compression="zstd") as writer:
+        _write_batches(table, writer, progress)
+
+
+def write_csv(df, path, progress, n_points, mode):
+    table = _to_table(df)
+    with pa.CompressedOutputStream(path, "gzip") as sink, pa_csv.CSVWriter(sink, table.schema) as writer:
+        _write_batches(table, writer, progress)
+
+
+def _table_html(rows):
+    if not rows:
+        return ""
+    header = "".join(f"<th>{html.escape(str(key))}</th>" for key in rows[0])
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(_format(value))}</td>" for value in row.values()) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{header}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def _format(value):
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return "—" if value is None else str(value)
+
+
+def write_report(df, path, progress, n_points, mode):
+    """
+    Отдельный HTML-файл: показатели, фазы и прореженные графики. plotly.js
+    встраивается в файл один раз, поэтому отчёт открывается без сети.
+    """
+    current_columns, voltage_columns, temp_columns, other_numeric_columns = figures.column_groups(df)
+    charts = []
+    if current_columns:
+        charts.append(lambda: figures.line_figure(
+            df, TIME_COLUMN, current_columns, "График токов", "Время (сек)", "Значение mA", n_points, mode))
+    if voltage_columns:
+        charts.append(lambda: figures.line_figure(
+            df, TIME_COLUMN, voltage_columns, "График напряжений", "Время (сек)", "Значение mV", n_points, mode))
+    if temp_columns:
+        charts.append(lambda: figures.line_figure(
+            df, TIME_COLUMN, temp_columns, "График температур", "Время (сек)", "Значение", n_points, mode))
+    if current_columns and voltage_columns:
+        charts.append(lambda: figures.dual_axis_figure(
+            df, TIME_COLUMN, voltage_columns, current_columns, n_points, mode))
+    for column in other_numeric_columns:
+        charts.append(lambda column=column: figures.line_figure(
+            df, TIME_COLUMN, [column], f"График для параметра: {column}", "Время (сек)", "Значение", n_points, mode))
+
+    t = df[TIME_COLUMN]
+    parts = [
+        "<h1>Отчёт по логу</h1>",
+        f"<p>Строк: {len(df)}. Окно: {t.min():g} – {t.max():g} сек.</p>" if len(df) else "<p>Нет данных</p>",
+    ]
+    totals = metrics.summary(df)
+    if totals:
+        parts.append("<h2>Показатели</h2>" + _table_html(
+            [{metrics.SUMMARY_LABELS[key]: value for key, value in totals.items()}]))
+        phases = metrics.phases(df)
+        if not phases.empty:
+            parts.append("<h2>Фазы заряда и разряда</h2>" + _table_html(phases.to_dict("records")))
+
+    for idx, build in enumerate(charts):
+        parts.append(build().to_html(full_html=False, include_plotlyjs=idx == 0))
+        progress.update(fraction=(idx + 1) / len(charts), text=f"Построено графиков: {idx + 1} из {len(charts)}")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Отчёт по логу</title>"
+            "<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse}"
+            "td,th{border:1px solid #ccc;padding:4px 8px;text-align:right}</style></head><body>"
+            + "\n".join(parts)
+            + "</body></html>"
+        )
+
+
+WRITERS = {
+    "parquet": write_parquet,
+    "csv": write_csv,
+    "html": write_report,
+}
+
+
+def export_job(digest, window, fmt, n_points, mode, progress):
+    """
+    Фоновая задача (см. jobs): записывает окно лога в выбранном формате и
+    возвращает путь к файлу.
+    """
+    path = export_path(digest, window, fmt, n_points, mode)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    df = get_cache().get(digest, window)
+    if df is None:
+        raise FileNotFoundError("Разобранный лог не найден в кэше, откройте файл заново")
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        WRITERS[fmt](df, tmp_path, progress, n_points, mode)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    evict(EXPORT_DIR, EXPORT_MAX_BYTES, SUFFIXES)
+    return path
@@ -0,0 +1,149 @@
+import threading
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from cachetools import LRUCache
+
+from constants import FIGURE_CACHE_SIZE
+from decimation import decimate
+
+COLORS = ['blue', 'green', 'orange', 'purple', 'red', 'cyan', 'magenta']
+VOLTAGE_COLORS = ['blue', 'navy']
+CURRENT_COLORS = ['red', 'darkred']
+
+# Общее оформление осей всех графиков лога
+AXIS_STYLE = dict(
+    showgrid=True,
+    gridwidth=1,
+    gridcolor='lightgray',
+    zeroline=True,
+    zerolinecolor='black',
+    zerolinewidth=2,
+    linecolor='black',
+    linewidth=2,
+    mirror=True,
+    tickfont=dict(size=16, weight='bold'),
+)
+
+# Шаблон на основе стандартного "plotly": поля, белый фон и оси.
+# tickformat="f" отключает экспоненциальный формат на оси времени
+TEMPLATE = go.layout.Template(pio.templates["plotly"])
+TEMPLATE.layout.update(
+    margin=dict(l=50, r=50, t=50, b=50),
+    plot_bgcolor='white',
+    xaxis=dict(AXIS_STYLE, linewidth=3, tickformat="f"),
+    yaxis=AXIS_STYLE,
+)
+
+# Общий для всех сессий процесса кэш готовых фигур. Ключ задаёт вызывающий код
+# и должен однозначно определять данные графика: хэш лога, окно времени,
+# набор столбцов и параметры прореживания. Фигуры из кэша изменять нельзя:
+# их словарь для браузера уже посчитан (см. CachedFigure).
+_cache = LRUCache(maxsize=FIGURE_CACHE_SIZE)
+_lock = threading.Lock()
+
+
+def column_groups(df, time_col='Время'):
+    """
+    Делит числовые столбцы лога на токи, напряжения, температуры и остальные.
+    """
+    current_columns = [col for col in df.columns if 'ток' in col.lower()]
+    voltage_columns = [col for col in df.columns if 'напряжение' in col.lower()]
+    temp_columns = [col for col in df.columns if 'температура' in col.lower()]
+    other_numeric_columns = [
+        col for col in df.select_dtypes(include=['number']).columns
+        if col not in current_columns and col not in voltage_columns and col not in temp_columns and col != time_col
+    ]
+    return current_columns, voltage_columns, temp_columns, other_numeric_columns
+
+
+class CachedFigure(go.Figure):
+    """
+    Фигура из общего кэша. st.plotly_chart на каждом rerun берёт её словарь
+    через to_dict(), поэтому словарь и размер его JSON считаются один раз,
+    при сохранении в кэш.
+    """
+
+    def __init__(self, figure):
+        super().__init__(figure)
+        self._spec = super().to_dict()
+        self._payload = len(pio.to_json(self._spec, validate=False).encode())
+
+    def to_dict(self):
+        return self._spec
+
+    @property
+    def payload(self):
+        """
+        Размер JSON фигуры в байтах — столько уходит в браузер.
+        """
+        return self._payload
+
+
+def cached_figure(key, build):
+    """
+    Возвращает фигуру из кэша или строит её вызовом build() и сохраняет.
+    """
+    with _lock:
+        fig = _cache.get(key)
+    if fig is None:
+        fig = CachedFigure(build())
+        with _lock:
+            _cache[key] = fig
+    return fig
+
+
+def line_figure(df, x_col, y_cols, title, x_title, y_title, n_points, mode, show_legend=True):
+    fig = go.Figure(layout=dict(template=TEMPLATE))
+    for idx, col in enumerate(y_cols):
+        x, y = decimate(df[x_col].to_numpy(), df[col].to_numpy(), n_points, mode)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name=col,
+            line=dict(color=COLORS[idx % len(COLORS)], width=2.5)
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        showlegend=show_legend,
+    )
+    return fig
+
+
+def dual_axis_figure(df, x_col, voltage_cols, current_cols, n_points, mode):
+    """
+    Напряжения на левой оси, токи на правой.
+    """
+    fig = go.Figure(layout=dict(template=TEMPLATE))
+    for idx, col in enumerate(voltage_cols):
+        x, y = decimate(df[x_col].to_numpy(), df[col].to_numpy(), n_points, mode)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name=f"Напряжение: {col}",
+            yaxis="y1",
+            line=dict(color=VOLTAGE_COLORS[idx % len(VOLTAGE_COLORS)], width=2.5)
+        ))
+    for idx, col in enumerate(current_cols):
+        x, y = decimate(df[x_col].to_numpy(), df[col].to_numpy(), n_points, mode)
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines',
+            name=f"Ток: {col}",
+            yaxis="y2",
+            line=dict(color=CURRENT_COLORS[idx % len(CURRENT_COLORS)], width=2.5)
+        ))
+
+    fig.update_layout(
+        title="График напряжений и токов",
+        xaxis_title="Время (сек)",
+        yaxis=dict(title="Напряжение mV", side="left"),
+        yaxis2=dict(AXIS_STYLE, title="Ток mA", overlaying="y", side="right", showgrid=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    return fig
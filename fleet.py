@@ -0,0 +1,54 @@
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import api_client
+from constants import API_CONNECT_TIMEOUT, FLEET_DISPATCH_TIMEOUT, FLEET_DISPATCH_WORKERS
+
+
+def device_params(params, device):
+    """
+    Копия общей очереди действий для конкретного устройства.
+    """
+    params = copy.deepcopy(params)
+    params["device_name"] = device.device_name
+    params["device_ip"] = device.device_ip
+    params["sd_file"] = str(params["sd_file"])
+    return params
+
+
+def start_actions(device, params):
+    started = time.perf_counter()
+    result = {
+        "Устройство": device.device_name,
+        "IP-адрес": device.device_ip,
+        "Код ответа": None,
+        "Результат": "ошибка",
+        "Подробности": "",
+    }
+    try:
+        response = api_client.post(
+            "/start_device_actions",
+            json=device_params(params, device),
+            timeout=(API_CONNECT_TIMEOUT, FLEET_DISPATCH_TIMEOUT),
+        )
+        result["Код ответа"] = response.status_code
+        if response.ok:
+            result["Результат"] = "запущено"
+        else:
+            result["Подробности"] = response.text[:200]
+    except requests.exceptions.RequestException as e:
+        result["Подробности"] = str(e)
+    result["Время, мс"] = round((time.perf_counter() - started) * 1000)
+    return result
+
+
+def dispatch(devices, params, workers=FLEET_DISPATCH_WORKERS):
+    """
+    Отправляет одну очередь действий на все устройства параллельно, не более
+    чем в workers потоков. Возвращает результаты в порядке списка устройств.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(devices)))) as pool:
+        return list(pool.map(lambda device: start_actions(device, params), devices))
@@ -1,229 +1,323 @@
+import os
+import time
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
+import requests
+
+import api_client
+import battery_cache
+import job_view
+import perf
+import startup
+from constants import LOG_FILE_TYPES
+from jobs import get_registry
+
+# Сколько совпадений показывать при выборе аккумулятора для записи ёмкости
+MAX_MATCHES = 50
+
+
+def save_capacity(battery, capacity):
+    data = {
+        "serial_number": battery["serial_number"],
+        "capacity": capacity,
+        "comments": battery["comments"] if battery["comments"] else None
+    }
+    response = api_client.put(f"/batteries/{battery['id']}", json=data)
+    response.raise_for_status()
+    battery = response.json()
+    battery_cache.on_updated(battery)
+    return battery
 
 
-def parse_data_line(line):
+def show_bad_lines(bad_lines, samples):
+    if not bad_lines:
+        return
+    st.warning(f"Пропущено строк, которые не удалось разобрать: {bad_lines}")
+    with st.expander("Нераспознанные строки"):
+        st.dataframe(
+            [{"Строка": line_number, "Содержимое": text} for line_number, text in samples],
+            hide_index=True, use_container_width=True,
+        )
+        if bad_lines > len(samples):
+            st.caption(f"Показаны первые {len(samples)} из {bad_lines}")
+
+
+def show_partial(progress):
     """
-    Парсит строку данных и возвращает словарь с ключами и значениями (на русском языке).
+    Промежуточный результат разбора: первые строки лога и уже найденные
+    нераспознанные строки.
     """
-    RUSSIAN_NAMES = {
-        "time": "Время",
-        "temp_bat": "Температура батареи",
-        "temp_env": "Температура окружающей среды",
-        "temp_load": "Температура нагрузки",
-        "bat_voltage": "Напряжение батареи",
-        "bat_current": "Ток батареи",
-        "load_voltage": "Напряжение нагрузки",
-        "load_current": "Ток нагрузки",
-        "load_duty": "Скважность ШИМ в %",
-        "charge_status": "Статус зарядки",
-        "const_current": "Постоянный ток",
-        "const_voltage": "Постоянное напряжение"
-    }
+    show_bad_lines(progress.get("bad_lines"), progress.get("bad_line_samples", []))
+    preview = progress.get("preview")
+    if preview is not None:
+        st.caption(f"Первые строки лога ({len(preview)}), разбор продолжается")
+        st.dataframe(preview, use_container_width=True)
 
-    data = {}
-    pairs = line.split()
-    for pair in pairs:
-        key, value = pair.split('=')
 
-        # Переводим ключ, если он есть в словаре, иначе оставляем как есть
-        translated_key = RUSSIAN_NAMES.get(key, key)
+def show_metrics(df):
+    """
+    Производные показатели по выбранному окну лога и запись измеренной
+    ёмкости в карточку аккумулятора.
+    """
+    import metrics
+
+    totals = metrics.summary(df)
+    if not totals:
+        return
 
+    st.subheader("Показатели")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Заряд, мА·ч", f"{totals['charge_mah']:.1f}")
+    col2.metric("Энергия, Вт·ч", f"{totals['energy_wh']:.3f}")
+    col3.metric("Средняя мощность, Вт", f"{totals['avg_power_w']:.2f}")
+    col4.metric("Пиковая мощность, Вт", f"{totals['peak_power_w']:.2f}")
+    resistance = totals["resistance_mohm"]
+    col5.metric(
+        "Внутр. сопротивление, мОм",
+        f"{resistance:.1f}" if resistance is not None else "—",
+        help=f"Медиана по {totals['resistance_steps']} ступенькам тока",
+    )
+
+    phases = metrics.phases(df)
+    if not phases.empty:
+        with st.expander(f"Фазы заряда и разряда ({len(phases)})"):
+            st.dataframe(phases, hide_index=True, use_container_width=True)
+
+    if totals["resistance_steps"]:
+        with st.expander("Ступеньки тока"):
+            st.dataframe(metrics.resistance_steps(df), hide_index=True, use_container_width=True)
+
+    with st.expander("Записать ёмкость в карточку аккумулятора"):
+        measured = metrics.discharge_capacity(df)
+        if measured is None:
+            st.info("В выбранном окне нет участка разряда, ёмкость не измерена")
+            return
+        query = st.text_input("Поиск по серийному номеру или #ID", key="capacity_battery_query")
+        if not query:
+            st.caption("Введите серийный номер или #ID аккумулятора")
+            return
+        # Каталог загружается только для поиска, без backend графики остаются доступны
         try:
-            value = float(value)
-            if value.is_integer():
-                value = int(value)
-        except ValueError:
-            pass  # Оставляем как строку, если не число
-        data[translated_key] = value
-    return data
+            index = battery_cache.get_battery_index()
+        except requests.exceptions.RequestException as e:
+            st.error(f"Не удалось загрузить каталог аккумуляторов: {e}")
+            return
+        matches = index.search(query, limit=MAX_MATCHES)
+        if not matches:
+            st.info("Нет аккумуляторов, подходящих под запрос")
+            return
+        battery_id = st.selectbox(
+            "Аккумулятор",
+            options=[b["id"] for b in matches],
+            format_func=lambda battery_id: f"#{battery_id} - {index.get(battery_id)['serial_number']}"
+        )
+        battery = index.get(battery_id)
+        capacity = max(1, round(measured))
+        st.caption(f"Текущая ёмкость: {battery['capacity']}, измеренная по разряду: {capacity}")
+        if st.button("Записать ёмкость"):
+            try:
+                updated_battery = save_capacity(battery, capacity)
+                st.success(f"Ёмкость аккумулятора #{updated_battery['id']} обновлена")
+            except requests.exceptions.HTTPError as e:
+                st.error(f"Ошибка: {e.response.json().get('detail', 'Неизвестная ошибка')}")
+            except requests.exceptions.RequestException as e:
+                st.error(f"Не удалось записать ёмкость: {e}")
+
+
+def show_export(digest, window, n_points, mode, file_name):
+    """
+    Экспорт выбранного окна в фоновой задаче и кнопка скачивания готового файла.
+    """
+    import exports
+
+    with st.expander("Экспорт"):
+        fmt = st.selectbox(
+            "Формат", list(exports.EXPORT_FORMATS), format_func=lambda fmt: exports.EXPORT_FORMATS[fmt][0]
+        )
+        title, extension, mime = exports.EXPORT_FORMATS[fmt]
+        registry = get_registry()
+        key = ("export", digest, window, fmt, n_points, mode)
+        job = registry.get(key)
+        if job is None:
+            if st.button("Подготовить файл"):
+                registry.submit(
+                    key, f"Экспорт {file_name} ({title})", exports.export_job, digest, window, fmt, n_points, mode
+                )
+                st.rerun()
+        elif job.error:
+            job_view.show_failed(job)
+        elif not job.done:
+            job_view.wait_for([job])
+        elif os.path.exists(job.result()):
+            with open(job.result(), "rb") as f:
+                st.download_button(
+                    "Скачать", f, file_name=f"{os.path.splitext(file_name)[0]}.{extension}", mime=mime
+                )
+        else:
+            # Файл вытеснен из каталога экспорта
+            registry.forget(key)
+            st.rerun()
 
 
 def main():
+    started = time.perf_counter()
     st.title("Просмотр данных из файла")
 
-    uploaded_file = st.file_uploader("Выберите файл", type=["txt"])
+    startup.warm("Парсер логов", startup.warm_parser)
+    uploaded_file = st.file_uploader("Выберите файл", type=LOG_FILE_TYPES)
 
-    if uploaded_file is not None:
+    # Лог, открытый со страницы устройства (см. Devices/devices.py), пока не выбран файл
+    device_log = st.session_state.get("device_log") if uploaded_file is None else None
+    if device_log is not None:
+        col1, col2 = st.columns([4, 1])
+        col1.info(f"Лог с устройства: {device_log['title']}")
+        if col2.button("Закрыть лог"):
+            del st.session_state.device_log
+            st.rerun()
 
-        try:
-            lines = uploaded_file.readlines()
+    if uploaded_file is not None or device_log is not None:
+        # pandas, pyarrow и plotly загружаются только после выбора файла,
+        # и не раньше, чем их догрузит прогрев парсера
+        startup.wait("Парсер логов")
+        import figures
+        from decimation import DEFAULT_POINTS, MODES
+        from log_cache import file_digest, load_log_async
+        from log_parser import memory_footprint, time_slice
 
-            lines = [line.decode('utf-8').strip() for line in lines]
-
-            if lines:
+        try:
+            # Разбор идёт в фоновом процессе: rerun страницы его не прерывает,
+            # а страница перерисуется, как только результат попадёт в кэш.
+            # Окно по времени с прошлого rerun отбирается ещё в кэше, и в память
+            # загружается только оно
+            if uploaded_file is not None:
+                # Хэш файла считаем один раз на загрузку, а не на каждый rerun
+                digests = st.session_state.setdefault("log_digests", {})
+                if uploaded_file.file_id not in digests:
+                    digests[uploaded_file.file_id] = file_digest(uploaded_file)
+                digest, file_name = digests[uploaded_file.file_id], uploaded_file.name
+                window_key = f"time_window_{digest}"
+                df, job = load_log_async(
+                    uploaded_file, digest, f"Разбор {file_name}", st.session_state.get(window_key)
+                )
+            else:
+                # Лог загружается с устройства и разбирается по мере загрузки
+                from device_logs import load_device_log_async, log_digest
 
-                parsed_data = [parse_data_line(line) for line in lines]
+                entry = device_log["entry"]
+                digest, file_name = log_digest(device_log["device_ip"], entry), entry["name"]
+                window_key = f"time_window_{digest}"
+                df, job = load_device_log_async(
+                    device_log["device_ip"], entry, f"Загрузка {device_log['title']}", st.session_state.get(window_key)
+                )
+            if job is not None:
+                if job.error:
+                    job_view.show_failed(job)
+                else:
+                    job_view.wait_for([job], show_partial)
+                return
+            show_bad_lines(df.attrs.get("bad_lines"), df.attrs.get("bad_line_samples", []))
+            perf.detail("parse", df.attrs.get("parse_timings"))
 
-                df = pd.DataFrame(parsed_data)
+            if df.attrs.get("log_rows", len(df)):
 
                 if 'Время' not in df.columns:
                     st.error("Файл должен содержать столбец 'Время'.")
                     return
-                else:
-                    df['Время'] = df['Время'] - df['Время'].iloc[0]
-
-                current_columns = [col for col in df.columns if 'ток' in col.lower()]
-                voltage_columns = [col for col in df.columns if 'напряжение' in col.lower()]
-                temp_columns = [col for col in df.columns if 'температура' in col.lower()]
-                other_numeric_columns = [
-                    col for col in df.select_dtypes(include=['number']).columns
-                    if col not in current_columns and col not in voltage_columns and col not in temp_columns and col != 'Время'
-                ]
-
-                def create_plot(df, x_col, y_cols, title, x_title, y_title, show_legend=True):
-                    fig = go.Figure()
-                    colors = ['blue', 'green', 'orange', 'purple', 'red', 'cyan', 'magenta']
-                    for idx, col in enumerate(y_cols):
-                        fig.add_trace(go.Scatter(
-                            x=df[x_col], 
-                            y=df[col], 
-                            mode='lines',
-                            name=col,
-                            line=dict(color=colors[idx % len(colors)], width=2.5)
-                        ))
-                    fig.update_layout(
-                        title=title,
-                        xaxis_title=x_title,
-                        yaxis_title=y_title,
-                        template="plotly",
-                        showlegend=show_legend,
-                        margin=dict(l=50, r=50, t=50, b=50),
-                        plot_bgcolor='white',
-                        xaxis=dict(
-                            showgrid=True,
-                            gridwidth=1,
-                            gridcolor='lightgray',
-                            zeroline=True,
-                            zerolinecolor='black',
-                            zerolinewidth=2,
-                            linecolor='black',
-                            linewidth=3,
-                            mirror=True,
-                            tickfont=dict(size=16, weight='bold'),
-                            tickformat="f"  # <---- ЗДЕСЬ: отключаем экспоненциальный формат
+
+                compact_bytes, wide_bytes = memory_footprint(df)
+                st.caption(
+                    f"Строк: {df.attrs.get('log_rows', len(df))}, загружено: {len(df)}. "
+                    f"Память: {compact_bytes / 2**20:.1f} МБ (без компактных типов ≈ {wide_bytes / 2**20:.1f} МБ)"
+                )
+
+                with st.sidebar:
+                    st.subheader("Прореживание графиков")
+                    decimation_mode = st.selectbox(
+                        "Метод", list(MODES.keys()), format_func=lambda mode: MODES[mode]
+                    )
+                    n_points = st.number_input(
+                        "Точек на линию", min_value=100, max_value=100000, value=DEFAULT_POINTS, step=100
+                    )
+
+                # Прореживание выполняется для выбранного окна, поэтому при сужении
+                # окна графики перестраиваются с большей детализацией.
+                # Время в логе начинается с нуля (см. log_parser.relative_time)
+                t_min, t_max = map(float, df.attrs.get("log_time_range") or (df['Время'].min(), df['Время'].max()))
+                window = (t_min, t_max)
+                if t_max > t_min:
+                    window = st.slider("Окно по времени (сек)", t_min, t_max, (t_min, t_max), key=window_key)
+                    # Лог не из кэша загружен целиком, окно из кэша уже отобрано — срез ничего не копирует
+                    df = time_slice(df, *window)
+
+                show_metrics(df)
+                show_export(digest, window, n_points, decimation_mode, file_name)
+
+                current_columns, voltage_columns, temp_columns, other_numeric_columns = figures.column_groups(df)
+
+                # Фигуры зависят только от лога, окна и прореживания, поэтому берутся
+                # из общего кэша и не перестраиваются при изменении других виджетов
+                figure_key = (digest, window, decimation_mode, n_points)
+
+                def line(kind, y_cols, title, y_title):
+                    return figures.cached_figure(
+                        figure_key + (kind, tuple(y_cols)),
+                        lambda: figures.line_figure(
+                            df, 'Время', y_cols, title, "Время (сек)", y_title, n_points, decimation_mode
                         ),
-                        yaxis=dict(
-                            showgrid=True,
-                            gridwidth=1,
-                            gridcolor='lightgray',
-                            zeroline=True,
-                            zerolinecolor='black',
-                            zerolinewidth=2,
-                            linecolor='black',
-                            linewidth=2,
-                            mirror=True,
-                            tickfont=dict(size=16, weight='bold')
-                        )
                     )
-                    return fig
 
-                if current_columns:
-                    st.subheader("График токов")
-                    fig_currents = create_plot(
-                        df, 'Время', current_columns, "График токов", "Время (сек)", "Значение mA"
+                def combined():
+                    return figures.cached_figure(
+                        figure_key + ("combined", tuple(voltage_columns), tuple(current_columns)),
+                        lambda: figures.dual_axis_figure(
+                            df, 'Время', voltage_columns, current_columns, n_points, decimation_mode
+                        ),
                     )
-                    st.plotly_chart(fig_currents, use_container_width=True)
 
+                # Раздел: заголовок и функция, строящая фигуру. Строятся и отправляются
+                # в браузер только разделы, выбранные в списке
+                sections = {}
+                if current_columns:
+                    sections["currents"] = (
+                        "График токов", lambda: line("currents", current_columns, "График токов", "Значение mA")
+                    )
                 if voltage_columns:
-                    st.subheader("График напряжений")
-                    fig_voltages = create_plot(
-                        df, 'Время', voltage_columns, "График напряжений", "Время (сек)", "Значение mV"
+                    sections["voltages"] = (
+                        "График напряжений",
+                        lambda: line("voltages", voltage_columns, "График напряжений", "Значение mV"),
                     )
-                    st.plotly_chart(fig_voltages, use_container_width=True)
-
                 if temp_columns:
-                    st.subheader("График температур")
-                    fig_temps = create_plot(
-                        df, 'Время', temp_columns, "График температур", "Время (сек)", "Значение"
+                    sections["temps"] = (
+                        "График температур", lambda: line("temps", temp_columns, "График температур", "Значение")
                     )
-                    st.plotly_chart(fig_temps, use_container_width=True)
-
                 if current_columns and voltage_columns:
-                    st.subheader("График напряжений и токов (две оси)")
-                    fig_combined = go.Figure()
-
-                    colors_voltage = ['blue', 'navy']
-                    colors_current = ['red', 'darkred']
-
-                    for idx, col in enumerate(voltage_columns):
-                        fig_combined.add_trace(go.Scatter(
-                            x=df['Время'],
-                            y=df[col],
-                            mode='lines',
-                            name=f"Напряжение: {col}",
-                            yaxis="y1",
-                            line=dict(color=colors_voltage[idx % len(colors_voltage)], width=2.5)
-                        ))
-
-                    for idx, col in enumerate(current_columns):
-                        fig_combined.add_trace(go.Scatter(
-                            x=df['Время'],
-                            y=df[col],
-                            mode='lines',
-                            name=f"Ток: {col}",
-                            yaxis="y2",
-                            line=dict(color=colors_current[idx % len(colors_current)], width=2.5)
-                        ))
-
-                    fig_combined.update_layout(
-                        title="График напряжений и токов",
-                        xaxis_title="Время (сек)",
-                        yaxis=dict(
-                            title="Напряжение mV",
-                            side="left",
-                            showgrid=True,
-                            gridwidth=1,
-                            gridcolor='lightgray',
-                            zeroline=True,
-                            zerolinecolor='black',
-                            zerolinewidth=2,
-                            linecolor='black',
-                            linewidth=2,
-                            mirror=True,
-                            tickfont=dict(size=16, weight='bold')
-                        ),
-                        yaxis2=dict(
-                            title="Ток mA",
-                            overlaying="y",
-                            side="right",
-                            showgrid=False,
-                            linecolor='black',
-                            linewidth=2,
-                            mirror=True,
-                            zeroline=True,
-                            zerolinecolor='black',
-                            zerolinewidth=2,
-                            tickfont=dict(size=16, weight='bold')
-                        ),
-                        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                        template="plotly",
-                        margin=dict(l=50, r=50, t=50, b=50),
-                        plot_bgcolor='white',
-                        xaxis=dict(
-                            showgrid=True,
-                            gridwidth=1,
-                            gridcolor='lightgray',
-                            zeroline=True,
-                            zerolinecolor='black',
-                            zerolinewidth=2,
-                            linecolor='black',
-                            linewidth=3,
-                            mirror=True,
-                            tickfont=dict(size=16, weight='bold'),
-                            tickformat="f"
-                        )
+                    sections["combined"] = ("График напряжений и токов (две оси)", combined)
+                for column in other_numeric_columns:
+                    sections[f"other:{column}"] = (
+                        f"График для параметра: {column}",
+                        lambda column=column: line("other", [column], f"График для параметра: {column}", "Значение"),
                     )
-                    st.plotly_chart(fig_combined, use_container_width=True)
 
-                if other_numeric_columns:
-                    st.subheader("Графики других параметров")
-                    for column in other_numeric_columns:
-                        fig_other = create_plot(
-                            df, 'Время', [column], f"График для параметра: {column}", "Время (сек)", "Значение"
+                default = [key for key in ("voltages", "currents") if key in sections] or list(sections)[:1]
+                selected = st.multiselect(
+                    "Графики", list(sections), default=default, format_func=lambda key: sections[key][0]
+                )
+                if len(selected) < len(sections):
+                    st.caption(f"Показано графиков: {len(selected)} из {len(sections)}, остальные можно добавить в списке")
+                first_chart = st.empty()
+
+                for idx, key in enumerate(key for key in sections if key in selected):
+                    title, build = sections[key]
+                    st.subheader(title)
+                    with perf.span(perf.STAGE_FIGURE, title):
+                        figure = build()
+                    with perf.span(perf.STAGE_CHART, title) as chart:
+                        chart["bytes"] = figure.payload
+                        st.plotly_chart(figure, use_container_width=True)
+                    if idx == 0:
+                        first_chart.caption(
+                            f"Первый график построен за {(time.perf_counter() - started) * 1000:.0f} мс от начала обновления страницы"
                         )
-                        st.plotly_chart(fig_other, use_container_width=True)
 
             else:
                 st.warning("Файл пуст.")
@@ -0,0 +1,44 @@
+import streamlit as st
+
+from constants import JOB_POLL_SECONDS
+from jobs import get_registry
+from perf_view import markdown_table
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def wait_for(jobs, show_partial=None):
+    """
+    Показывает ход фоновых задач и перезапускает страницу, когда все они
+    завершатся. Перерисовывается отдельно от страницы, поэтому ожидание не
+    блокирует остальные виджеты. show_partial, если задан, вызывается со
+    словарём хода каждой задачи, чтобы показать промежуточный результат.
+    """
+    for job in jobs:
+        status = job.status()
+        st.progress(status["Выполнено, %"] / 100, f"{job.title}: {status['Подробности'] or status['Состояние']}")
+        if show_partial is not None:
+            show_partial(job.snapshot())
+    if all(job.done for job in jobs):
+        st.rerun()
+
+
+def show_failed(job):
+    """
+    Сообщение об упавшей задаче и кнопка повторного запуска.
+    """
+    st.error(f"{job.title}: ошибка ({job.error})")
+    if st.button("Повторить", key=f"retry_{hash(job.key)}"):
+        get_registry().forget(job.key)
+        st.rerun()
+
+
+def jobs_table():
+    """
+    Таблица всех фоновых задач процесса. Рисуется в боковой колонке каждой
+    страницы, поэтому без st.dataframe (см. perf_view.markdown_table).
+    """
+    jobs = get_registry().jobs()
+    if jobs:
+        st.markdown(markdown_table([job.status() for job in jobs]))
+    else:
+        st.caption("Нет фоновых задач")
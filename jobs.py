@@ -0,0 +1,208 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import spawn
+
+from constants import JOB_RETENTION_SECONDS, PARSE_WORKERS
+
+_context = multiprocessing.get_context("spawn")
+_pool = None
+_manager = None
+_pool_lock = threading.Lock()
+
+
+def _preparation_data(name):
+    """
+    Данные для запуска дочернего процесса spawn без модуля __main__.
+
+    Streamlit подставляет в __main__ страницу, которую выполняет сессия, и
+    spawn выполнил бы её заново в каждом дочернем процессе. Подменять
+    __main__ на время запуска нельзя: сценарии других сессий меняют его без
+    общей блокировки. Задачи пула лежат в импортируемых модулях, поэтому
+    главный модуль дочерним процессам не нужен.
+    """
+    data = _get_preparation_data(name)
+    data.pop("init_main_from_name", None)
+    data.pop("init_main_from_path", None)
+    return data
+
+
+if getattr(spawn.get_preparation_data, "__module__", None) != __name__:
+    _get_preparation_data = spawn.get_preparation_data
+    spawn.get_preparation_data = _preparation_data
+
+
+def get_pool():
+    """
+    Общий пул процессов для тяжёлых задач. Используется spawn, чтобы дочерние
+    процессы не наследовали потоки сервера Streamlit.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS, mp_context=_context)
+        return _pool
+
+
+def reset_pool(pool):
+    """
+    Забывает пул, если он сломан (например, дочерний процесс упал), чтобы
+    следующая задача создала новый.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_manager():
+    """
+    Процесс-менеджер, через словари которого задачи сообщают о ходе работы.
+    """
+    global _manager
+    with _pool_lock:
+        if _manager is None:
+            _manager = _context.Manager()
+        return _manager
+
+
+class Job:
+    """
+    Задача в пуле процессов. progress — общий с задачей словарь, в который она
+    пишет "fraction" (от 0 до 1) и "text".
+    """
+
+    def __init__(self, key, title, future, progress):
+        self.key = key
+        self.title = title
+        self.future = future
+        self.progress = progress
+        self.started = time.time()
+        self.finished = None
+        future.add_done_callback(self._on_done)
+
+    def _on_done(self, future):
+        self.finished = time.time()
+
+    @property
+    def done(self):
+        return self.future.done()
+
+    @property
+    def error(self):
+        if not self.future.done() or self.future.cancelled():
+            return None
+        return self.future.exception()
+
+    def result(self):
+        return self.future.result()
+
+    def snapshot(self, keys=None):
+        """
+        Копия словаря хода работы (только ключей keys, если заданы); пустая,
+        если процесс-менеджер уже недоступен.
+        """
+        try:
+            if keys is None:
+                return dict(self.progress)
+            return {key: self.progress[key] for key in keys if key in self.progress}
+        except (OSError, EOFError):
+            return {}
+
+    def status(self):
+        """
+        Снимок состояния для показа: доля выполнения, текст, длительность.
+        """
+        # Без промежуточного результата: его распаковка потянула бы pandas на страницы без логов
+        progress = self.snapshot(("fraction", "text"))
+        elapsed = (self.finished or time.time()) - self.started
+        if self.done:
+            state = "ошибка" if self.error else "готово"
+            fraction = 1.0
+        else:
+            state = "выполняется"
+            fraction = min(max(float(progress.get("fraction", 0.0)), 0.0), 1.0)
+        return {
+            "Задача": self.title,
+            "Состояние": state,
+            "Выполнено, %": round(fraction * 100),
+            "Время, с": round(elapsed, 1),
+            "Подробности": str(self.error) if self.error else progress.get("text", ""),
+        }
+
+
+class JobRegistry:
+    """
+    Общий для всех сессий процесса реестр фоновых задач.
+
+    Задача ищется по ключу, поэтому rerun страницы находит уже запущенную задачу,
+    а не начинает работу заново. Завершённые задачи вместе с результатом
+    хранятся JOB_RETENTION_SECONDS, упавшие можно запустить повторно.
+    """
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, title, func, *args):
+        """
+        Запускает func(*args, progress) в пуле процессов, если задачи с таким
+        ключом ещё нет или она завершилась ошибкой. Возвращает задачу.
+        """
+        self.prune()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not (job.done and job.error):
+                return job
+
+            progress = get_manager().dict()
+            pool = get_pool()
+            try:
+                future = pool.submit(func, *args, progress)
+            except BrokenProcessPool:
+                reset_pool(pool)
+                pool = get_pool()
+                future = pool.submit(func, *args, progress)
+            future.add_done_callback(
+                lambda f: reset_pool(pool) if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool) else None
+            )
+            job = Job(key, title, future, progress)
+            self._jobs[key] = job
+            return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def forget(self, key):
+        with self._lock:
+            self._jobs.pop(key, None)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def prune(self):
+        """
+        Удаляет задачи, завершившиеся раньше чем JOB_RETENTION_SECONDS назад.
+        """
+        deadline = time.time() - JOB_RETENTION_SECONDS
+        with self._lock:
+            for key, job in list(self._jobs.items()):
+                if job.finished is not None and job.finished < deadline:
+                    del self._jobs[key]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = JobRegistry()
+        return _registry
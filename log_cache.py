@@ -0,0 +1,246 @@
+import hashlib
+import io
+import json
+import os
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+import jobs
+from constants import LOG_CACHE_DIR, LOG_CACHE_MAX_BYTES, LOG_PREVIEW_ROWS
+from log_parser import TIME_COLUMN, parse_log, window_bounds
+
+# Меняется вместе со схемой DataFrame, который возвращает parse_log
+CACHE_VERSION = 2
+
+# Ключ метаданных схемы Arrow, в котором хранится df.attrs
+ATTRS_KEY = b"log_attrs"
+
+HASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def file_digest(fileobj):
+    """
+    Считает sha256 содержимого файла, читая его блоками, и возвращает позицию в начало.
+    """
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def chunked_window_bounds(column, start, end):
+    """
+    window_bounds для отсортированного столбца Arrow из нескольких кусков.
+    ChunkedArray.to_numpy() склеил бы куски в копию всего столбца, поэтому
+    поиск идёт в каждом куске над его буфером из memory map. Столбец
+    отсортирован, значит номера границ — суммы позиций границ в кусках.
+    """
+    lo = hi = 0
+    for chunk in column.chunks:
+        chunk_lo, chunk_hi = window_bounds(chunk.to_numpy(zero_copy_only=not chunk.null_count), start, end)
+        lo += chunk_lo
+        hi += chunk_hi
+    return lo, hi
+
+
+class LogCache:
+    """
+    Кэш разобранных логов на диске в формате Feather (Arrow IPC без сжатия).
+
+    Файлы читаются через memory map, поэтому повторное открытие большого лога
+    не требует ни разбора, ни полного чтения с диска. Общий размер кэша
+    ограничен max_bytes, при переполнении удаляются давно не открывавшиеся файлы.
+    """
+
+    def __init__(self, directory=LOG_CACHE_DIR, max_bytes=LOG_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, digest):
+        return os.path.join(self.directory, f"{digest}-v{CACHE_VERSION}.feather")
+
+    def get(self, digest, window=None):
+        """
+        Возвращает разобранный лог или None, если его нет в кэше.
+
+        Если задано окно window = (start, end), строки отбираются по времени
+        ещё в Arrow и в pandas переводится только окно: из memory map читаются
+        столбец времени и страницы окна. Число строк и диапазон времени всего
+        лога записываются в attrs "log_rows" и "log_time_range".
+        """
+        path = self.path(digest)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (FileNotFoundError, pa.ArrowInvalid):
+            return None
+        attrs = json.loads((table.schema.metadata or {}).get(ATTRS_KEY, b"{}"))
+        if TIME_COLUMN in table.column_names and table.num_rows:
+            t = table.column(TIME_COLUMN)
+            bounds = pc.min_max(t)
+            attrs.update(log_rows=table.num_rows, log_time_range=(bounds["min"].as_py(), bounds["max"].as_py()))
+            if window is not None:
+                start, end = window
+                if attrs.get("time_sorted"):
+                    lo, hi = chunked_window_bounds(t, start, end)
+                    table = table.slice(lo, hi - lo)
+                else:
+                    table = table.filter(pc.and_(pc.greater_equal(t, start), pc.less_equal(t, end)))
+        df = table.to_pandas()
+        df.attrs.update(attrs)
+        # Время доступа храним в mtime, по нему работает вытеснение
+        os.utime(path)
+        return df
+
+    def put(self, digest, df):
+        """
+        Сохраняет DataFrame в кэш. Возвращает False, если столбцы нельзя
+        записать в Arrow (например, смешанные строки и числа).
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(digest)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            table = table.replace_schema_metadata({**table.schema.metadata, ATTRS_KEY: json.dumps(df.attrs)})
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        self.evict()
+        return True
+
+    def evict(self):
+        evict(self.directory, self.max_bytes, (".feather",))
+
+
+def evict(directory, max_bytes, suffixes):
+    """
+    Удаляет из каталога самые старые по времени доступа файлы с указанными
+    окончаниями имени, пока их общий размер не уложится в max_bytes.
+    """
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(suffixes):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+_cache = None
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = LogCache()
+    return _cache
+
+
+def load_log(fileobj, digest=None, progress=None):
+    """
+    Возвращает разобранный лог из кэша или разбирает файл и сохраняет результат.
+    progress передаётся в parse_log и вызывается только при разборе.
+    """
+    cache = get_cache()
+    if digest is None:
+        digest = file_digest(fileobj)
+
+    df = cache.get(digest)
+    if df is None:
+        fileobj.seek(0)
+        df = parse_log(fileobj, progress=progress)
+        if not df.empty:
+            cache.put(digest, df)
+    return df
+
+
+def read_all(fileobj):
+    fileobj.seek(0)
+    return fileobj.read()
+
+
+def report_partial(progress, stats):
+    """
+    Кладёт в словарь хода задачи первые строки лога и нераспознанные строки,
+    чтобы страница показала их, не дожидаясь конца разбора.
+    """
+    if "preview" not in progress and not stats["frame"].empty:
+        progress["preview"] = stats["frame"].head(LOG_PREVIEW_ROWS)
+    progress.update(bad_lines=stats["bad_lines"], bad_line_samples=list(stats["bad_line_samples"]))
+
+
+def parse_job(digest, data, progress):
+    """
+    Фоновая задача (см. jobs): разбирает лог и кладёт его в кэш, чтобы не
+    передавать DataFrame обратно через pickle. DataFrame возвращается, только
+    если лог пуст или его нельзя сохранить в кэш.
+    """
+    def report(stats):
+        progress.update(
+            fraction=stats["bytes"] / max(len(data), 1),
+            text=f"Разобрано строк: {stats['lines']}, с ошибками: {stats['bad_lines']}",
+        )
+        report_partial(progress, stats)
+
+    df = parse_log(io.BytesIO(data), progress=report)
+    if not df.empty and get_cache().put(digest, df):
+        return None
+    return df
+
+
+def load_async(digest, title, make_job, window=None):
+    """
+    Не блокирующая загрузка лога через кэш. Возвращает (DataFrame, None), если
+    лог есть в кэше или задача завершена, иначе (None, задача) — повторный вызов
+    на следующем rerun найдёт ту же задачу. Задача, завершившаяся ошибкой,
+    возвращается как есть и не перезапускается.
+
+    make_job() возвращает функцию задачи и её аргументы (см. parse_job) и
+    вызывается, только если задачу нужно запустить. window передаётся в
+    LogCache.get; лог, который не попал в кэш, возвращается целиком.
+    """
+    df = get_cache().get(digest, window)
+    if df is not None:
+        return df, None
+
+    registry = jobs.get_registry()
+    key = ("parse", digest)
+    job = registry.get(key)
+    if job is not None and job.done and not job.error:
+        df = job.result()
+        if df is not None:
+            return df, None
+        # Разобранный лог уже вытеснен из кэша
+        registry.forget(key)
+        job = None
+    if job is None:
+        job = registry.submit(key, title, *make_job())
+    return None, job
+
+
+def load_log_async(fileobj, digest, title, window=None):
+    """
+    Не блокирующий вариант load_log (см. load_async).
+    """
+    return load_async(digest, title, lambda: (parse_job, digest, read_all(fileobj)), window)
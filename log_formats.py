@@ -0,0 +1,162 @@
+"""
+Форматы файлов логов: определение по первым байтам, потоковая распаковка
+gzip и zstd и двоичный формат с записями фиксированной длины.
+
+Двоичный лог:
+    BINARY_MAGIC (8 байт)
+    длина заголовка, uint32 little-endian
+    заголовок — JSON в UTF-8:
+        {"fields": [["time", "<f8"], ["bat_voltage", "<f4"], ...],
+         "categories": {"charge_status": ["CHARGE", "DISCHARGE"]}}
+    записи: поля в порядке fields без выравнивания, до конца файла
+
+Ключи полей те же, что в текстовом логе key=value, поэтому столбцы получают
+те же русские названия. Поле из categories хранит номер значения в списке,
+наибольшее значение целого типа (или отрицательное) означает пропуск.
+Записи читаются numpy.frombuffer без разбора строк.
+
+zstd распаковывается кодеком pyarrow, отдельный пакет для него не нужен.
+"""
+import gzip
+import json
+import struct
+
+import numpy as np
+import pyarrow as pa
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+BINARY_MAGIC = b"BATLOG1\n"
+
+FORMAT_TEXT = "text"
+FORMAT_BINARY = "binary"
+
+HEADER_LENGTH = struct.Struct("<I")
+
+# Сколько первых байт нужно, чтобы узнать формат
+MAGIC_SIZE = max(len(GZIP_MAGIC), len(ZSTD_MAGIC), len(BINARY_MAGIC))
+
+
+class CountingReader:
+    """
+    Обёртка над файлом, которая считает прочитанные из него байты и сначала
+    отдаёт уже прочитанное начало head. По consumed считается ход разбора
+    сжатых файлов: распакованных байт больше, чем в исходном файле.
+    """
+
+    # Для pa.PythonFile: обёртка не владеет файлом и не закрывает его
+    closed = False
+
+    def __init__(self, fileobj, head=b""):
+        self.fileobj = fileobj
+        self.head = head
+        self.consumed = 0
+
+    def close(self):
+        pass
+
+    def read(self, size=-1):
+        if not self.head:
+            data = self.fileobj.read(size)
+        elif size is None or size < 0:
+            data, self.head = self.head + self.fileobj.read(), b""
+        else:
+            data, self.head = self.head[:size], self.head[size:]
+        self.consumed += len(data)
+        return data
+
+
+def _prefixed(fileobj):
+    """
+    Читает начало файла и возвращает его вместе с читателем, который отдаст
+    файл целиком, включая это начало.
+    """
+    head = b""
+    while len(head) < MAGIC_SIZE:
+        data = fileobj.read(MAGIC_SIZE - len(head))
+        if not data:
+            break
+        head += data
+    return head, CountingReader(fileobj, head)
+
+
+def open_log(fileobj):
+    """
+    Определяет формат лога и снимает сжатие. Возвращает (читатель содержимого,
+    счётчик байт исходного файла, FORMAT_TEXT или FORMAT_BINARY).
+    """
+    head, source = _prefixed(fileobj)
+    stream = source
+    # Сжатие может быть только внешним слоем: .txt.gz, .bin.zst
+    if head.startswith(GZIP_MAGIC):
+        stream = gzip.GzipFile(fileobj=source, mode="rb")
+    elif head.startswith(ZSTD_MAGIC):
+        stream = pa.CompressedInputStream(pa.PythonFile(source, mode="r"), "zstd")
+    if stream is not source:
+        head, stream = _prefixed(stream)
+    return stream, source, FORMAT_BINARY if head.startswith(BINARY_MAGIC) else FORMAT_TEXT
+
+
+def read_exact(stream, size):
+    data = b""
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            break
+        data += block
+    return data
+
+
+def read_binary_header(stream):
+    """
+    Читает заголовок двоичного лога. Возвращает dtype записи и словарь
+    {ключ поля: список значений} для категориальных полей.
+    """
+    if read_exact(stream, len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Это не двоичный лог")
+    (length,) = HEADER_LENGTH.unpack(read_exact(stream, HEADER_LENGTH.size))
+    header = json.loads(read_exact(stream, length).decode("utf-8"))
+    dtype = np.dtype([(key, np.dtype(kind)) for key, kind in header["fields"]])
+    categories = header.get("categories", {})
+    for key, values in categories.items():
+        if key not in dtype.names or dtype[key].kind not in "ui":
+            raise ValueError(f"Категориальное поле {key} должно быть целым")
+    return dtype, categories
+
+
+def iter_records(stream, dtype, chunk_size):
+    """
+    Читает записи блоками по целому числу записей и отдаёт их массивами
+    numpy.frombuffer. Неполная запись в конце файла возвращается отдельно
+    вторым элементом последней пары, у остальных пар он пустой.
+    """
+    block_size = max(chunk_size // dtype.itemsize, 1) * dtype.itemsize
+    tail = b""
+    while True:
+        block = stream.read(block_size)
+        if not block:
+            break
+        block = tail + block
+        whole = len(block) - len(block) % dtype.itemsize
+        tail = block[whole:]
+        if whole:
+            yield np.frombuffer(block, dtype=dtype, count=whole // dtype.itemsize), b""
+    if tail:
+        yield np.empty(0, dtype=dtype), tail
+
+
+def write_binary(fileobj, columns, categories=None):
+    """
+    Записывает двоичный лог. columns — словарь {ключ: массив numpy} одинаковой
+    длины, порядок полей — порядок словаря. Для ключей из categories
+    ({ключ: список значений}) массив содержит номера значений в списке.
+    """
+    fields = [(key, np.asarray(values).dtype.newbyteorder("<").str) for key, values in columns.items()]
+    dtype = np.dtype([(key, np.dtype(kind)) for key, kind in fields])
+    records = np.empty(len(next(iter(columns.values()), [])), dtype=dtype)
+    for key, values in columns.items():
+        records[key] = values
+
+    header = json.dumps({"fields": fields, "categories": categories or {}}).encode("utf-8")
+    fileobj.write(BINARY_MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+    fileobj.write(records.tobytes())
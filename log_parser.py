@@ -0,0 +1,547 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from log_formats import FORMAT_BINARY, iter_records, open_log, read_binary_header, write_binary
+
+RUSSIAN_NAMES = {
+    "time": "Время",
+    "temp_bat": "Температура батареи",
+    "temp_env": "Температура окружающей среды",
+    "temp_load": "Температура нагрузки",
+    "bat_voltage": "Напряжение батареи",
+    "bat_current": "Ток батареи",
+    "load_voltage": "Напряжение нагрузки",
+    "load_current": "Ток нагрузки",
+    "load_duty": "Скважность ШИМ в %",
+    "charge_status": "Статус зарядки",
+    "const_current": "Постоянный ток",
+    "const_voltage": "Постоянное напряжение"
+}
+
+TIME_COLUMN = "Время"
+
+# Целые типы по возрастанию размера, в которые пробуются целые столбцы
+INT_DTYPES = (np.uint8, np.int16, np.int32)
+
+# Размер блока, который читается из файла за один раз
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# Сколько нераспознанных строк сохранять для показа пользователю
+BAD_LINE_SAMPLES = 100
+
+NEWLINE, SPACE, EQUALS = ord("\n"), ord(" "), ord("=")
+
+# Значение, которое parse_data_line и arrow читают как число
+NUMBER_PATTERN = r"(?i)^[+-]?((\d+\.?\d*|\.\d+)(e[+-]?\d+)?|nan|inf|infinity)$"
+
+# Этапы разбора, время которых записывается в df.attrs["parse_timings"]:
+# чтение блоков, разметка строк, векторное чтение arrow,
+# построчный разбор через parse_data_line и сборка DataFrame
+PARSE_STAGES = ("read", "scan", "arrow", "parse_data_line", "dataframe")
+
+
+def parse_data_line(line):
+    """
+    Парсит строку данных и возвращает словарь с ключами и значениями (на русском языке).
+    """
+    data = {}
+    pairs = line.split()
+    for pair in pairs:
+        key, value = pair.split('=')
+
+        # Переводим ключ, если он есть в словаре, иначе оставляем как есть
+        translated_key = RUSSIAN_NAMES.get(key, key)
+
+        try:
+            value = float(value)
+            if value.is_integer():
+                value = int(value)
+        except ValueError:
+            pass  # Оставляем как строку, если не число
+        data[translated_key] = value
+    return data
+
+
+def iter_chunks(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Читает файл блоками байт, каждый блок заканчивается переводом строки.
+    Блок всегда обрезается по последнему переводу строки, поэтому строки
+    и многобайтовые символы UTF-8 не разрываются между блоками.
+    """
+    tail = b""
+    while True:
+        block = fileobj.read(chunk_size)
+        if not block:
+            break
+        block = tail + block
+        cut = block.rfind(b"\n")
+        if cut == -1:
+            tail = block
+            continue
+        tail = block[cut + 1:]
+        yield block[:cut + 1]
+    if tail:
+        yield tail + b"\n"
+
+
+def _line_keys(line):
+    """
+    Возвращает список ключей строки или None, если строка не вида key=value.
+    """
+    keys = []
+    for pair in line.split():
+        parts = pair.split("=")
+        if len(parts) != 2 or not parts[0] or not parts[1]:
+            return None
+        keys.append(parts[0])
+    return keys or None
+
+
+def _count_per_line(buf, byte, bounds):
+    """
+    Считает количество вхождений байта в каждой строке блока.
+    """
+    positions = np.flatnonzero(buf == byte)
+    return np.diff(np.searchsorted(positions, bounds))
+
+
+def _compact(values, name):
+    """
+    Приводит столбец к компактному типу: целые — к наименьшему подходящему
+    (uint8, int16, int32, int64), дробные — к float32, строки — к категориям.
+    Время остаётся float64, в относительное оно переводится в parse_log.
+    """
+    if isinstance(values, pd.Categorical):
+        return values
+    values = np.asarray(values)
+    if values.dtype == object:
+        return pd.Categorical(values)
+    if values.dtype.kind not in "iuf" or name == TIME_COLUMN or len(values) == 0:
+        return values
+
+    if values.dtype.kind == "f":
+        if not (np.isfinite(values).all() and np.array_equal(values, np.trunc(values))):
+            return values.astype(np.float32)
+    lo, hi = values.min(), values.max()
+    for dtype in INT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return values.astype(dtype, copy=False)
+    return values.astype(np.int64, copy=False)
+
+
+def _to_column(values, name):
+    """
+    Приводит столбец строк arrow к типизированному компактному массиву,
+    нечисловые столбцы становятся категориями.
+    """
+    try:
+        numbers = pc.cast(values, pa.float64()).to_numpy()
+    except pa.ArrowInvalid:
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks()
+        encoded = pc.dictionary_encode(values)
+        return pd.Categorical.from_codes(encoded.indices.to_numpy(), encoded.dictionary.to_pylist())
+    return _compact(numbers, name)
+
+
+def compact_frame(df):
+    """
+    Приводит все столбцы DataFrame к компактным типам (см. _compact).
+    """
+    return pd.DataFrame({name: _compact(df[name].array, name) for name in df.columns}, index=df.index)
+
+
+def relative_time(df):
+    """
+    Заменяет абсолютное время на время от первой строки со временем: int32, если время
+    целое и укладывается в диапазон, иначе float64. Начало отсчёта
+    сохраняется в df.attrs["time_origin"], признак отсортированности
+    времени — в df.attrs["time_sorted"].
+    """
+    if df.empty or TIME_COLUMN not in df.columns:
+        return df
+    t = df[TIME_COLUMN].to_numpy(dtype=np.float64)
+    finite = np.flatnonzero(np.isfinite(t))
+    origin = t[finite[0]] if len(finite) else 0.0
+    t = t - origin
+    if np.isfinite(t).all() and np.array_equal(t, np.trunc(t)) and np.abs(t).max() <= np.iinfo(np.int32).max:
+        t = t.astype(np.int32)
+    df[TIME_COLUMN] = t
+    df.attrs["time_origin"] = float(origin)
+    df.attrs["time_sorted"] = bool(np.all(t[1:] >= t[:-1]))
+    return df
+
+
+def window_bounds(values, start, end):
+    """
+    Номера первой и следующей за последней строки отсортированного массива
+    времени values, попадающих в [start, end], бинарным поиском.
+    """
+    if values.dtype.kind in "iu":
+        # Границы приводятся к типу столбца, иначе numpy скопирует весь столбец во float64
+        info = np.iinfo(values.dtype)
+        start, end = (values.dtype.type(np.clip(bound, info.min, info.max))
+                      for bound in (np.ceil(start), np.floor(end)))
+    return np.searchsorted(values, start, side="left"), np.searchsorted(values, end, side="right")
+
+
+def time_slice(df, start, end):
+    """
+    Строки со временем в диапазоне [start, end]. Время в логе обычно
+    отсортировано, тогда границы находятся бинарным поиском и возвращается
+    срез без копирования данных. Иначе строки отбираются маской по всему
+    столбцу. Окно лога из кэша лучше брать через LogCache.get(digest, window).
+    """
+    t = df[TIME_COLUMN]
+    time_sorted = df.attrs.get("time_sorted")
+    if time_sorted is None:
+        time_sorted = t.is_monotonic_increasing
+    if time_sorted:
+        lo, hi = window_bounds(t.to_numpy(), start, end)
+        return df.iloc[lo:hi]
+    return df[(t >= start) & (t <= end)]
+
+
+def _align_categories(frames):
+    """
+    Даёт категориальным столбцам всех блоков общий набор категорий, иначе
+    pd.concat превратит их обратно в object.
+    """
+    categories = {}
+    for frame in frames:
+        for name in frame.columns:
+            if isinstance(frame[name].dtype, pd.CategoricalDtype):
+                categories.setdefault(name, []).append(frame[name].cat.categories)
+    for name, parts in categories.items():
+        union = parts[0].append(parts[1:]).unique() if len(parts) > 1 else parts[0]
+        for frame in frames:
+            if name in frame.columns and isinstance(frame[name].dtype, pd.CategoricalDtype):
+                frame[name] = frame[name].cat.set_categories(union)
+
+
+def memory_footprint(df):
+    """
+    Возвращает (байт в памяти, байт без компактных типов). Второе — оценка
+    для того же DataFrame со столбцами int64/float64 и строками object.
+    """
+    compact = int(df.memory_usage(deep=True, index=False).sum())
+    wide = 0
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            sizes = np.array([sys.getsizeof(value) for value in column.cat.categories] + [sys.getsizeof(np.nan)])
+            wide += 8 * len(column) + int(sizes[column.cat.codes.to_numpy()].sum())
+        elif column.dtype == object:
+            wide += int(column.memory_usage(deep=True, index=False))
+        else:
+            wide += 8 * len(column)
+    return compact, wide
+
+
+class LogParser:
+    """
+    Векторный парсер логов вида key=value.
+
+    Набор ключей определяется по первой корректной строке. Строки блока с тем же
+    набором ключей в том же порядке проверяются numpy-операциями над байтами и
+    читаются целиком CSV-ридером arrow, остальные строки разбираются построчно
+    через parse_data_line.
+
+    Столбец считается числовым, если числа в нём составляют большинство
+    значений. Строка с нечисловым значением в числовом столбце (например,
+    bat_voltage=ERR) тоже считается нераспознанной.
+
+    Строки, которые не удалось разобрать, пропускаются: их число хранится
+    в bad_lines, первые BAD_LINE_SAMPLES — в bad_samples вместе с номером
+    строки в файле (с единицы). Время этапов (PARSE_STAGES) накапливается
+    в timings.
+    """
+
+    def __init__(self):
+        self.keys = None
+        self.columns = None
+        self.numeric = set()
+        self.lines = 0
+        self.bad_lines = 0
+        self.bad_samples = []
+        self.timings = dict.fromkeys(PARSE_STAGES, 0.0)
+
+    def _lap(self, stage, started):
+        now = time.perf_counter()
+        self.timings[stage] += now - started
+        return now
+
+    def _bad_line(self, line_number, raw):
+        self.bad_lines += 1
+        if len(self.bad_samples) < BAD_LINE_SAMPLES:
+            self.bad_samples.append((int(line_number) + 1, raw.decode("utf-8", errors="replace").strip()[:200]))
+
+    def _detect_template(self, chunk):
+        for line in chunk.decode("utf-8", errors="replace").splitlines():
+            keys = _line_keys(line)
+            if keys and len(set(keys)) == len(keys):
+                self.keys = keys
+                self.columns = [RUSSIAN_NAMES.get(key, key) for key in keys]
+                return
+
+    def _read_fast(self, text):
+        """
+        Читает строки шаблона как таблицу и возвращает словарь столбцов
+        и маску строк, у которых ключи совпали с шаблоном.
+        """
+        names = [f"c{idx}" for idx in range(len(self.keys))]
+        table = pa_csv.read_csv(
+            pa.py_buffer(text),
+            read_options=pa_csv.ReadOptions(column_names=names),
+            parse_options=pa_csv.ParseOptions(delimiter=" ", quote_char=False),
+            convert_options=pa_csv.ConvertOptions(column_types={name: pa.string() for name in names}),
+        )
+        ok = None
+        values = []
+        for idx, key in enumerate(self.keys):
+            column = table.column(idx)
+            prefix = len(key) + 1
+            key_ok = pc.and_(pc.starts_with(column, f"{key}="), pc.greater(pc.binary_length(column), prefix))
+            ok = key_ok if ok is None else pc.and_(ok, key_ok)
+            values.append(pc.utf8_slice_codeunits(column, prefix))
+
+        if not pc.all(ok).as_py():
+            values = [column.filter(ok) for column in values]
+        ok = ok.to_numpy(zero_copy_only=False)
+
+        columns = {}
+        numbers = None
+        for name, column in zip(self.columns, values):
+            try:
+                columns[name] = _compact(pc.cast(column, pa.float64()).to_numpy(), name)
+                self.numeric.add(name)
+                continue
+            except pa.ArrowInvalid:
+                pass
+            is_number = pc.match_substring_regex(column, NUMBER_PATTERN)
+            if name in self.numeric or 2 * pc.sum(is_number).as_py() > len(column):
+                self.numeric.add(name)
+                numbers = is_number if numbers is None else pc.and_(numbers, is_number)
+            else:
+                columns[name] = _to_column(column, name)
+
+        if numbers is not None:
+            # Строки с нечисловым значением в числовом столбце уходят в построчный
+            # разбор, который отметит их как нераспознанные
+            numbers = numbers.to_numpy(zero_copy_only=False)
+            ok = ok.copy()
+            ok[np.flatnonzero(ok)[~numbers]] = False
+            columns = {
+                name: _to_column(column.filter(numbers), name) for name, column in zip(self.columns, values)
+            }
+        return columns, ok
+
+    def parse_chunk(self, chunk, start=0):
+        """
+        Разбирает блок байт в DataFrame. Индекс DataFrame — номер строки в файле
+        (начиная с start), пустые строки пропускаются.
+        Возвращает DataFrame и количество строк в блоке.
+        """
+        started = time.perf_counter()
+        if b"\r" in chunk:
+            chunk = chunk.replace(b"\r", b"")
+        if b"\t" in chunk:
+            chunk = chunk.replace(b"\t", b" ")
+        if self.keys is None:
+            self._detect_template(chunk)
+
+        buf = np.frombuffer(chunk, dtype=np.uint8)
+        ends = np.flatnonzero(buf == NEWLINE)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+
+        frames = []
+        fast = np.zeros(len(ends), dtype=bool)
+        if self.keys is not None:
+            n_keys = len(self.keys)
+            bounds = np.append(starts, len(buf))
+            fast = (
+                (ends > starts)
+                & (_count_per_line(buf, EQUALS, bounds) == n_keys)
+                & (_count_per_line(buf, SPACE, bounds) == n_keys - 1)
+                & (buf[starts] != SPACE)
+                & (buf[ends - 1] != SPACE)
+            )
+            if fast.any():
+                text = chunk if fast.all() else buf[np.repeat(fast, ends - starts + 1)].tobytes()
+                started = self._lap("scan", started)
+                try:
+                    columns, ok = self._read_fast(text)
+                except pa.ArrowInvalid:
+                    # Например, невалидный UTF-8: разбираем блок построчно
+                    fast[:] = False
+                    started = self._lap("arrow", started)
+                else:
+                    fast_index = np.flatnonzero(fast)
+                    fast[fast_index[~ok]] = False
+                    started = self._lap("arrow", started)
+                    frames.append(pd.DataFrame(columns, index=fast_index[ok] + start))
+                    started = self._lap("dataframe", started)
+        started = self._lap("scan", started)
+
+        slow_rows = []
+        slow_index = []
+        for pos in np.flatnonzero(~fast):
+            raw = chunk[starts[pos]:ends[pos]]
+            try:
+                line = raw.decode("utf-8").strip()
+                if line:
+                    row = parse_data_line(line)
+                    if any(isinstance(row.get(name), str) for name in self.numeric):
+                        raise ValueError("нечисловое значение в числовом столбце")
+                    slow_rows.append(row)
+                    slow_index.append(start + pos)
+            except ValueError:  # в том числе UnicodeDecodeError
+                self._bad_line(start + pos, raw)
+        started = self._lap("parse_data_line", started)
+        if slow_rows:
+            frames.append(compact_frame(pd.DataFrame(slow_rows, index=slow_index)))
+
+        if not frames:
+            df = pd.DataFrame()
+        elif len(frames) == 1:
+            df = frames[0]
+        else:
+            _align_categories(frames)
+            df = pd.concat(frames).sort_index()
+        self._lap("dataframe", started)
+        self.lines += len(ends)
+        return df, len(ends)
+
+    def parse_records(self, block, categories, start=0):
+        """
+        Переводит блок записей двоичного лога (см. log_formats.iter_records)
+        в DataFrame с теми же столбцами, что у текстового лога. Неполная
+        запись в конце файла и номера категорий вне списка значений
+        считаются нераспознанными строками, отрицательный или наибольший
+        для своего типа номер — пропущенным значением.
+        Возвращает DataFrame и количество записей в блоке.
+        """
+        started = time.perf_counter()
+        records, tail = block
+        columns = {}
+        for key in records.dtype.names:
+            name = RUSSIAN_NAMES.get(key, key)
+            values = records[key]
+            if key in categories:
+                codes = values.astype(np.int64)
+                missing = (codes < 0) | (codes == np.iinfo(values.dtype).max)
+                invalid = (codes >= len(categories[key])) & ~missing
+                for pos in np.flatnonzero(invalid):
+                    self._bad_line(start + pos, f"{key}: неизвестный номер значения {codes[pos]}".encode("utf-8"))
+                codes[missing | invalid] = -1
+                columns[name] = pd.Categorical.from_codes(codes, categories=categories[key])
+            else:
+                # Поле структурной записи — массив с шагом, ascontiguousarray копирует его подряд
+                columns[name] = _compact(np.ascontiguousarray(values), name)
+        n_records = len(records) + bool(tail)
+        if tail:
+            self._bad_line(start + len(records), f"неполная запись: {len(tail)} из {records.dtype.itemsize} байт".encode("utf-8"))
+        df = pd.DataFrame(columns, index=np.arange(start, start + len(records))) if len(records) else pd.DataFrame()
+        self._lap("dataframe", started)
+        self.lines += n_records
+        return df, n_records
+
+
+def parse_log(fileobj, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Читает лог блоками и возвращает DataFrame со столбцами на русском языке
+    в компактных типах: float32 для измерений, наименьшие целые для целых
+    столбцов, категории для строк и относительное время (см. relative_time).
+    Каждый блок сжимается сразу после разбора, поэтому пиковая память
+    ограничена одним блоком в широких типах.
+
+    Формат определяется по первым байтам (см. log_formats): текст key=value
+    или двоичные записи, в том числе сжатые gzip или zstd. Сжатый файл
+    распаковывается по мере чтения, "bytes" в progress считается по сжатому.
+
+    Нераспознанные строки не прерывают разбор: их число и примеры с номерами
+    строк записываются в df.attrs["bad_lines"] и df.attrs["bad_line_samples"].
+    progress, если задан, вызывается после каждого блока со словарём
+    {"bytes", "lines", "rows", "bad_lines"} — прочитано байт файла, строк (записей), получено
+    строк данных и пропущено строк с ошибками. Для показа промежуточного результата
+    в словаре есть и "frame" — DataFrame только что разобранного блока с абсолютным
+    временем, и "bad_line_samples" — примеры нераспознанных строк на этот момент. Время этапов разбора в секундах
+    записывается в df.attrs["parse_timings"].
+    """
+    parser = LogParser()
+    frames = []
+    start = 0
+    rows = 0
+    started = time.perf_counter()
+    stream, source, fmt = open_log(fileobj)
+    if fmt == FORMAT_BINARY:
+        dtype, categories = read_binary_header(stream)
+        blocks = iter_records(stream, dtype, chunk_size)
+        parse_block = lambda block, start: parser.parse_records(block, categories, start)  # noqa: E731
+    else:
+        blocks = iter_chunks(stream, chunk_size)
+        parse_block = parser.parse_chunk
+    for block in blocks:
+        parser._lap("read", started)
+        frame, n_lines = parse_block(block, start)
+        if not frame.empty:
+            frames.append(frame)
+        start += n_lines
+        rows += len(frame)
+        if progress is not None:
+            progress({
+                "bytes": source.consumed, "lines": parser.lines, "rows": rows, "bad_lines": parser.bad_lines,
+                "frame": frame, "bad_line_samples": parser.bad_samples,
+            })
+        started = time.perf_counter()
+    parser._lap("read", started)
+
+    if not frames:
+        df = pd.DataFrame()
+    else:
+        started = time.perf_counter()
+        if len(frames) > 1:
+            _align_categories(frames)
+            df = compact_frame(pd.concat(frames))
+        else:
+            df = frames[0]
+        df = relative_time(df.reset_index(drop=True))
+        parser._lap("dataframe", started)
+    df.attrs.update(
+        bad_lines=parser.bad_lines,
+        bad_line_samples=parser.bad_samples,
+        parse_timings={stage: round(seconds, 4) for stage, seconds in parser.timings.items()},
+    )
+    return df
+
+
+def write_binary_log(df, fileobj):
+    """
+    Записывает DataFrame из parse_log в двоичном формате (см. log_formats):
+    столбцам возвращаются исходные ключи, времени — абсолютные значения,
+    остальные столбцы пишутся в тех же компактных типах.
+    """
+    keys = {name: key for key, name in RUSSIAN_NAMES.items()}
+    columns = {}
+    categories = {}
+    for name in df.columns:
+        key = keys.get(name, name)
+        values = df[name].array
+        if isinstance(values, pd.Categorical):
+            categories[key] = [str(value) for value in values.categories]
+            # Пропуск (-1) становится наибольшим значением беззнакового типа
+            columns[key] = values.codes.astype(np.uint8 if len(values.categories) < 255 else np.uint16)
+        elif name == TIME_COLUMN:
+            columns[key] = df[name].to_numpy(dtype=np.float64) + df.attrs.get("time_origin", 0.0)
+        else:
+            columns[key] = df[name].to_numpy()
+    write_binary(fileobj, columns, categories)
@@ -1,12 +1,27 @@
+import contextlib
+
 import streamlit as st
 
+import api_client
+import job_view
+import perf
+import perf_view
+import startup
+
 devices = st.Page(
     "Devices/devices.py", title="Devices", icon="🤖", 
 )
 
+monitor = st.Page(
+    "Devices/monitor.py", title="Monitor", icon="📈", 
+)
+
 local_file = st.Page(
     "graphics.py", title="Parse file", icon="📂", 
 )
+compare = st.Page(
+    "compare.py", title="Compare files", icon="📊", 
+)
 
 bat_view = st.Page(
     "Batteries/view.py", title="View", icon="📜", 
@@ -20,14 +35,48 @@ bat_delete = st.Page(
 bat_add = st.Page(
     "Batteries/add.py", title="Add", icon="🔋", 
 )
+bat_bulk = st.Page(
+    "Batteries/bulk.py", title="Import/Export", icon="📦", 
+)
 
 pg = st.navigation(
     {
-        "Devices": [devices],
-        "Batteries": [bat_view, bat_add, bat_edit, bat_delete],
-        "Tests": [local_file],
+        "Devices": [devices, monitor],
+        "Batteries": [bat_view, bat_add, bat_edit, bat_delete, bat_bulk],
+        "Tests": [local_file, compare],
     }
 )
 
+# Сессия API создаётся один раз на процесс, в фоне, пока отрисовывается страница
+startup.warm("API-клиент", startup.warm_api_client)
+
+perf_enabled = perf_view.enabled()
+recording = perf.rerun(pg.title, perf_view.session_id()) if perf_enabled else contextlib.nullcontext()
+
+with startup.measure_page(pg.title), recording:
+    pg.run()
+
+if perf_enabled:
+    perf_view.panel()
+
+# Без st.table и st.dataframe: таблицы боковой колонки потянули бы pandas на каждую страницу
+with st.sidebar.expander("Задержки API"):
+    stats = api_client.latency_stats()
+    if stats:
+        st.markdown(perf_view.markdown_table(stats))
+    else:
+        st.caption("Запросов к API ещё не было")
+
+with st.sidebar.expander("Фоновые задачи"):
+    job_view.jobs_table()
 
-pg.run()
+with st.sidebar.expander("Время запуска"):
+    for row in startup.pages_report():
+        st.caption(
+            f"{row['Страница']}: первый показ {row['Первый показ, мс']} мс, "
+            f"модулей загружено: {row['Загружено модулей']}"
+            + (f" ({row['Тяжёлые библиотеки']})" if row['Тяжёлые библиотеки'] else "")
+        )
+    for row in startup.warm_report():
+        done = "выполняется" if row['Прогрев, мс'] is None else f"{row['Прогрев, мс']} мс"
+        st.caption(f"Прогрев «{row['Ресурс']}»: {done}" + (f", ошибка: {row['Ошибка']}" if row['Ошибка'] else ""))
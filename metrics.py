@@ -0,0 +1,167 @@
+"""
+Производные показатели аккумулятора по разобранному логу: заряд, энергия,
+мощность, внутреннее сопротивление и сводка по фазам заряда/разряда.
+
+Все расчёты векторные (NumPy) и не проходят по строкам в Python, поэтому
+на логах в миллионы строк занимают миллисекунды. Единицы измерения лога:
+напряжение в мВ, ток в мА, время в секундах.
+"""
+import numpy as np
+import pandas as pd
+
+from constants import IR_MIN_CURRENT_STEP, IR_MAX_STEP_SECONDS
+from log_parser import TIME_COLUMN
+
+CURRENT_COLUMN = "Ток батареи"
+VOLTAGE_COLUMN = "Напряжение батареи"
+STATUS_COLUMN = "Статус зарядки"
+DISCHARGE_STATUS = "DISCHARGE"
+
+# Подписи показателей, которые возвращает summary
+SUMMARY_LABELS = {
+    "charge_mah": "Заряд, мА·ч",
+    "energy_wh": "Энергия, Вт·ч",
+    "avg_power_w": "Средняя мощность, Вт",
+    "peak_power_w": "Пиковая мощность, Вт",
+    "resistance_mohm": "Внутр. сопротивление, мОм",
+    "resistance_steps": "Ступенек тока",
+}
+
+
+def _column(df, name):
+    return np.nan_to_num(df[name].to_numpy(dtype=np.float64))
+
+
+def _cumulative(t, values, mask=None):
+    """
+    Интеграл values по t методом трапеций нарастающим итогом, начиная с нуля.
+    Если задан mask, учитываются только интервалы, оба конца которых в mask.
+    """
+    result = np.zeros(len(t))
+    if len(t) > 1:
+        steps = (values[1:] + values[:-1]) / 2 * np.diff(t)
+        if mask is not None:
+            steps[~(mask[1:] & mask[:-1])] = 0
+        result[1:] = np.cumsum(steps)
+    return result
+
+
+def cumulative_charge(df, current_col=CURRENT_COLUMN, time_col=TIME_COLUMN):
+    """
+    Накопленный заряд в мА·ч по модулю тока (мА) методом трапеций.
+    Пропуски тока считаются нулём.
+    """
+    t = df[time_col].to_numpy(dtype=np.float64)
+    return _cumulative(t, np.abs(_column(df, current_col))) / 3600
+
+
+def discharged_charge(df, status_col=STATUS_COLUMN, current_col=CURRENT_COLUMN, time_col=TIME_COLUMN):
+    """
+    Накопленный отданный заряд в мА·ч: как cumulative_charge, но только по
+    участкам разряда, на остальных значение не растёт.
+    """
+    t = df[time_col].to_numpy(dtype=np.float64)
+    discharging = df[status_col].to_numpy() == DISCHARGE_STATUS
+    return _cumulative(t, np.abs(_column(df, current_col)), discharging) / 3600
+
+
+def power(df, voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN):
+    """
+    Мгновенная мощность в Вт по модулю тока.
+    """
+    return _column(df, voltage_col) * np.abs(_column(df, current_col)) / 1e6
+
+
+def cumulative_energy(df, voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN, time_col=TIME_COLUMN):
+    """
+    Накопленная энергия в Вт·ч.
+    """
+    t = df[time_col].to_numpy(dtype=np.float64)
+    return _cumulative(t, power(df, voltage_col, current_col)) / 3600
+
+
+def resistance_steps(df, min_step=IR_MIN_CURRENT_STEP, max_dt=IR_MAX_STEP_SECONDS,
+                     voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN, time_col=TIME_COLUMN):
+    """
+    Внутреннее сопротивление по постоянному току на ступеньках тока:
+    R = |ΔU / ΔI| между соседними отсчётами, где ток изменился не меньше чем
+    на min_step мА, а отсчёты отстоят не дальше max_dt секунд.
+    Возвращает DataFrame со ступеньками, сопротивление в мОм.
+    """
+    t = df[time_col].to_numpy(dtype=np.float64)
+    voltage = _column(df, voltage_col)
+    current = _column(df, current_col)
+    d_current = np.diff(current)
+    d_voltage = np.diff(voltage)
+    steps = np.flatnonzero((np.abs(d_current) >= min_step) & (np.diff(t) <= max_dt))
+    return pd.DataFrame({
+        TIME_COLUMN: t[steps + 1],
+        "ΔI, мА": d_current[steps],
+        "ΔU, мВ": d_voltage[steps],
+        "R, мОм": np.abs(d_voltage[steps] / d_current[steps]) * 1000,
+    })
+
+
+def phases(df, status_col=STATUS_COLUMN, voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN,
+           time_col=TIME_COLUMN):
+    """
+    Делит лог на непрерывные участки с одинаковым статусом зарядки и
+    считает для каждого длительность, заряд, энергию и мощность.
+    """
+    if df.empty or status_col not in df.columns:
+        return pd.DataFrame()
+
+    t = df[time_col].to_numpy(dtype=np.float64)
+    status = df[status_col].to_numpy()
+    starts = np.concatenate(([0], np.flatnonzero(status[1:] != status[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(df)])) - 1
+
+    charge = cumulative_charge(df, current_col, time_col)
+    p = power(df, voltage_col, current_col)
+    energy = _cumulative(t, p) / 3600
+    voltage = _column(df, voltage_col)
+
+    return pd.DataFrame({
+        "Статус": status[starts],
+        "Начало, сек": t[starts],
+        "Длительность, сек": t[ends] - t[starts],
+        "Заряд, мА·ч": charge[ends] - charge[starts],
+        "Энергия, Вт·ч": energy[ends] - energy[starts],
+        "Средняя мощность, Вт": np.add.reduceat(p, starts) / (ends - starts + 1),
+        "Пиковая мощность, Вт": np.maximum.reduceat(p, starts),
+        "Напряжение в начале, мВ": voltage[starts],
+        "Напряжение в конце, мВ": voltage[ends],
+    })
+
+
+def discharge_capacity(df, status_col=STATUS_COLUMN, voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN,
+                       time_col=TIME_COLUMN):
+    """
+    Измеренная ёмкость в мА·ч — заряд самого большого участка разряда
+    (см. phases). None, если в логе нет статуса зарядки или участков разряда.
+    """
+    table = phases(df, status_col, voltage_col, current_col, time_col)
+    if table.empty:
+        return None
+    discharge = table.loc[table["Статус"] == DISCHARGE_STATUS, "Заряд, мА·ч"]
+    return float(discharge.max()) if len(discharge) else None
+
+
+def summary(df, voltage_col=VOLTAGE_COLUMN, current_col=CURRENT_COLUMN, time_col=TIME_COLUMN):
+    """
+    Итоговые показатели по всему логу. Пустой словарь, если в логе нет
+    времени, напряжения или тока.
+    """
+    if df.empty or not {voltage_col, current_col, time_col} <= set(df.columns):
+        return {}
+
+    p = power(df, voltage_col, current_col)
+    steps = resistance_steps(df, voltage_col=voltage_col, current_col=current_col, time_col=time_col)
+    return {
+        "charge_mah": float(cumulative_charge(df, current_col, time_col)[-1]),
+        "energy_wh": float(cumulative_energy(df, voltage_col, current_col, time_col)[-1]),
+        "avg_power_w": float(p.mean()),
+        "peak_power_w": float(p.max()),
+        "resistance_mohm": float(steps["R, мОм"].median()) if len(steps) else None,
+        "resistance_steps": len(steps),
+    }
@@ -0,0 +1,207 @@
+"""
+Замеры производительности по отдельным обновлениям (rerun) страниц.
+
+Пока в потоке выполняется rerun (см. rerun), участки кода записывают в него
+время и объём данных: запросы к backend (api_client), построение графиков
+и их отправку в браузер, а также этапы разбора лога. Вне rerun запись
+ничего не делает, поэтому без включённой панели замеры почти бесплатны.
+
+Завершённые rerun хранятся в истории процесса (PERF_HISTORY_SIZE), а
+суммарные счётчики отдаются в текстовом формате Prometheus и в JSON Lines.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from constants import PERF_HISTORY_SIZE, PERF_LOG_ENV_VAR
+
+# Этапы, по которым группируются записи
+STAGE_BACKEND = "backend"
+STAGE_FIGURE = "figure"
+STAGE_CHART = "chart"
+
+STAGE_LABELS = {
+    STAGE_BACKEND: "Запрос к backend",
+    STAGE_FIGURE: "Построение графика",
+    STAGE_CHART: "Отправка графика",
+}
+
+_local = threading.local()
+_lock = threading.Lock()
+_history = deque(maxlen=PERF_HISTORY_SIZE)
+# Счётчики с начала работы процесса: {(page,): [count, seconds]} и {(stage, name): [count, seconds, bytes]}
+_rerun_totals = {}
+_span_totals = {}
+
+
+class Rerun:
+    """
+    Одно обновление страницы: общее время и записанные участки.
+    """
+
+    def __init__(self, page, session):
+        self.page = page
+        self.session = session
+        self.started = time.time()
+        self.wall_s = None
+        self.interrupted = False
+        self.spans = []
+        self.details = {}
+
+    def to_dict(self):
+        return {
+            "time": round(self.started, 3),
+            "page": self.page,
+            "session": self.session,
+            "wall_s": self.wall_s,
+            "interrupted": self.interrupted,
+            "spans": self.spans,
+            "details": self.details,
+        }
+
+
+def current():
+    return getattr(_local, "rerun", None)
+
+
+def active():
+    return current() is not None
+
+
+@contextmanager
+def rerun(page, session=None):
+    """
+    Записывает rerun страницы. Rerun, прерванный st.rerun или st.stop,
+    тоже сохраняется и помечается как прерванный.
+    """
+    record = Rerun(page, session)
+    _local.rerun = record
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        record.interrupted = True
+        raise
+    finally:
+        record.wall_s = round(time.perf_counter() - started, 4)
+        _local.rerun = None
+        _finish(record)
+
+
+def record(stage, name, seconds, nbytes=None):
+    """
+    Добавляет участок в текущий rerun потока.
+    """
+    rerun_record = current()
+    if rerun_record is not None:
+        rerun_record.spans.append({"stage": stage, "name": name, "s": round(seconds, 4), "bytes": nbytes})
+
+
+@contextmanager
+def span(stage, name):
+    """
+    Замеряет блок кода. Объём данных можно указать, записав его в
+    возвращаемый словарь под ключом "bytes".
+    """
+    if not active():
+        yield {}
+        return
+    extra = {}
+    started = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        record(stage, name, time.perf_counter() - started, extra.get("bytes"))
+
+
+def detail(name, value):
+    """
+    Прикладывает к текущему rerun дополнительные сведения, например этапы разбора лога.
+    """
+    rerun_record = current()
+    if rerun_record is not None:
+        rerun_record.details[name] = value
+
+
+def _finish(rerun_record):
+    with _lock:
+        _history.append(rerun_record)
+        totals = _rerun_totals.setdefault(rerun_record.page, [0, 0.0])
+        totals[0] += 1
+        totals[1] += rerun_record.wall_s
+        for item in rerun_record.spans:
+            totals = _span_totals.setdefault((item["stage"], item["name"]), [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += item["s"]
+            totals[2] += item["bytes"] or 0
+
+    path = os.environ.get(PERF_LOG_ENV_VAR)
+    if path:
+        line = json.dumps(rerun_record.to_dict(), ensure_ascii=False)
+        with _lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+def history(session=None):
+    """
+    Сохранённые rerun, новые первыми; при заданном session — только этой сессии.
+    """
+    with _lock:
+        records = list(_history)
+    return [r for r in reversed(records) if session is None or r.session == session]
+
+
+def json_lines(records=None):
+    return "".join(
+        json.dumps(r.to_dict(), ensure_ascii=False) + "\n" for r in (history() if records is None else records)
+    )
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus():
+    """
+    Счётчики процесса в текстовом формате Prometheus.
+    """
+    with _lock:
+        reruns = dict(_rerun_totals)
+        spans = dict(_span_totals)
+        last_parse = next((r.details.get("parse") for r in reversed(_history) if r.details.get("parse")), None)
+
+    lines = [
+        "# HELP app_rerun_seconds Время выполнения скрипта страницы за rerun.",
+        "# TYPE app_rerun_seconds summary",
+    ]
+    for page, (count, seconds) in sorted(reruns.items()):
+        lines.append(f'app_rerun_seconds_count{{page="{_label(page)}"}} {count}')
+        lines.append(f'app_rerun_seconds_sum{{page="{_label(page)}"}} {seconds:.6f}')
+
+    lines += [
+        "# HELP app_span_seconds Время участков rerun: запросы к backend, графики.",
+        "# TYPE app_span_seconds summary",
+    ]
+    for (stage, name), (count, seconds, _) in sorted(spans.items()):
+        labels = f'stage="{_label(stage)}",name="{_label(name)}"'
+        lines.append(f"app_span_seconds_count{{{labels}}} {count}")
+        lines.append(f"app_span_seconds_sum{{{labels}}} {seconds:.6f}")
+
+    lines += [
+        "# HELP app_span_bytes_total Объём данных участков: ответы backend, графики для браузера.",
+        "# TYPE app_span_bytes_total counter",
+    ]
+    for (stage, name), (_, _, nbytes) in sorted(spans.items()):
+        lines.append(f'app_span_bytes_total{{stage="{_label(stage)}",name="{_label(name)}"}} {nbytes}')
+
+    if last_parse:
+        lines += [
+            "# HELP app_parse_stage_seconds Этапы последнего разбора лога.",
+            "# TYPE app_parse_stage_seconds gauge",
+        ]
+        for stage, seconds in last_parse.items():
+            lines.append(f'app_parse_stage_seconds{{stage="{_label(stage)}"}} {seconds:.6f}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,120 @@
+import os
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import perf
+from constants import PERF_ENV_VAR, PERF_QUERY_PARAM
+
+PARSE_STAGE_LABELS = {
+    "read": "Чтение файла",
+    "scan": "Разметка строк",
+    "arrow": "Векторный разбор (arrow)",
+    "parse_data_line": "Построчный разбор (parse_data_line)",
+    "dataframe": "Сборка DataFrame",
+}
+
+# Сколько последних rerun сессии показывать в панели
+HISTORY_ROWS = 10
+
+
+def enabled():
+    """
+    Панель включена переменной окружения PERF_ENV_VAR для всех сессий или
+    параметром адреса ?perf=1 для текущей. Параметр запоминается в сессии,
+    потому что при переходе между страницами он пропадает из адреса.
+    """
+    if os.environ.get(PERF_ENV_VAR, "") not in ("", "0"):
+        return True
+    value = st.query_params.get(PERF_QUERY_PARAM)
+    if value is not None:
+        st.session_state.perf_panel = value not in ("", "0", "false")
+    return st.session_state.get("perf_panel", False)
+
+
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+def _cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def markdown_table(rows):
+    """
+    Таблица markdown из списка словарей для st.markdown. st.table и st.dataframe
+    потянули бы pandas, поэтому в боковой колонке, которая рисуется на каждой
+    странице, таблицы строятся так.
+    """
+    header = "| " + " | ".join(_cell(key) for key in rows[0]) + " |\n|" + "---|" * len(rows[0]) + "\n"
+    return header + "".join("| " + " | ".join(_cell(value) for value in row.values()) + " |\n" for row in rows)
+
+
+def _span_rows(rerun):
+    totals = {}
+    for item in rerun.spans:
+        entry = totals.setdefault((item["stage"], item["name"]), [0, 0.0, 0])
+        entry[0] += 1
+        entry[1] += item["s"]
+        entry[2] += item["bytes"] or 0
+    return [
+        {
+            "Этап": perf.STAGE_LABELS.get(stage, stage),
+            "Участок": name,
+            "Вызовов": count,
+            "мс": round(seconds * 1000, 1),
+            "КБ": round(nbytes / 1024, 1) if nbytes else "—",
+        }
+        for (stage, name), (count, seconds, nbytes) in sorted(totals.items(), key=lambda item: -item[1][1])
+    ]
+
+
+def _stage_ms(rerun, stage):
+    return round(sum(item["s"] for item in rerun.spans if item["stage"] == stage) * 1000, 1)
+
+
+def panel():
+    """
+    Панель в боковой колонке: последний rerun по участкам, этапы разбора
+    лога, история rerun сессии и выгрузка счётчиков процесса.
+    """
+    with st.sidebar.expander("Производительность", expanded=True):
+        records = perf.history(session_id())
+        if not records:
+            st.caption("Замеров ещё нет")
+            return
+
+        last = records[0]
+        st.caption(
+            f"Последний rerun «{last.page}»: {last.wall_s * 1000:.0f} мс"
+            + (", прерван st.rerun или st.stop" if last.interrupted else "")
+        )
+        rows = _span_rows(last)
+        if rows:
+            st.markdown(markdown_table(rows))
+
+        timings = last.details.get("parse")
+        if timings:
+            st.caption(f"Разбор лога: {sum(timings.values()):.2f} с")
+            st.markdown(markdown_table([
+                {"Этап": PARSE_STAGE_LABELS.get(stage, stage), "с": f"{seconds:.3f}"}
+                for stage, seconds in timings.items()
+            ]))
+
+        st.caption("Последние rerun")
+        st.markdown(markdown_table([
+            {
+                "Страница": rerun.page,
+                "Всего, мс": round(rerun.wall_s * 1000),
+                "Backend, мс": _stage_ms(rerun, perf.STAGE_BACKEND),
+                "Графики, мс": _stage_ms(rerun, perf.STAGE_FIGURE) + _stage_ms(rerun, perf.STAGE_CHART),
+            }
+            for rerun in records[:HISTORY_ROWS]
+        ]))
+
+        col1, col2 = st.columns(2)
+        col1.download_button("Prometheus", perf.prometheus(), file_name="perf.prom", mime="text/plain")
+        col2.download_button(
+            "JSON Lines", perf.json_lines(), file_name="perf.jsonl", mime="application/x-ndjson"
+        )
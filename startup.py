@@ -0,0 +1,107 @@
+"""
+Замеры запуска: сколько занял первый показ каждой страницы в этом процессе
+и какие тяжёлые библиотеки при этом пришлось загрузить, а также прогрев
+общих ресурсов в фоновых потоках (один раз на процесс).
+
+Разбивку первого показа на импорт и отрисовку по каждой странице даёт
+benchmarks/bench_startup.py.
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Библиотеки, загрузка которых заметна по времени и памяти
+HEAVY_MODULES = {"pandas", "numpy", "pyarrow", "plotly", "pydantic"}
+
+_lock = threading.Lock()
+_pages = {}
+_warm = {}
+_threads = {}
+
+
+@contextmanager
+def measure_page(title):
+    """
+    Замеряет первый в процессе показ страницы. Показ, прерванный st.rerun
+    или st.stop, не записывается, замер повторится при следующем показе.
+    """
+    with _lock:
+        first = title not in _pages
+    before = set(sys.modules) if first else None
+    started = time.perf_counter()
+    yield
+    if first:
+        loaded = set(sys.modules) - before
+        with _lock:
+            _pages.setdefault(title, {
+                "Страница": title,
+                "Первый показ, мс": round((time.perf_counter() - started) * 1000),
+                "Загружено модулей": len(loaded),
+                "Тяжёлые библиотеки": ", ".join(sorted({name.split(".")[0] for name in loaded} & HEAVY_MODULES)),
+            })
+
+
+def warm(name, func):
+    """
+    Выполняет func в фоновом потоке один раз на процесс и запоминает, сколько
+    это заняло. Повторные вызовы с тем же именем ничего не делают.
+    """
+    def run():
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            _warm[name]["Ошибка"] = str(e)
+        _warm[name]["Прогрев, мс"] = round((time.perf_counter() - started) * 1000)
+
+    with _lock:
+        if name in _warm:
+            return
+        _warm[name] = {"Ресурс": name, "Прогрев, мс": None, "Ошибка": ""}
+        _threads[name] = threading.Thread(target=run, name=f"warm-{name}", daemon=True)
+        _threads[name].start()
+
+
+def wait(name):
+    """
+    Дожидается прогрева с этим именем, если он запущен. Нужно перед импортом
+    тех же модулей на странице: одновременный импорт pandas из двух потоков
+    может получить не до конца загруженный модуль.
+    """
+    with _lock:
+        thread = _threads.get(name)
+    if thread is not None and thread is not threading.current_thread():
+        thread.join()
+
+
+def warm_api_client():
+    """
+    Создаёт общие сессии API с пулами соединений.
+    """
+    import api_client
+
+    api_client.get_session(retry=True)
+    api_client.get_session(retry=False)
+
+
+def warm_parser():
+    """
+    Загружает pandas, pyarrow и numpy и разбирает одну строку, чтобы первый
+    настоящий разбор не платил за инициализацию.
+    """
+    import io
+
+    from log_parser import parse_log
+
+    parse_log(io.BytesIO(b"time=1 bat_voltage=4200 bat_current=100\n"))
+
+
+def pages_report():
+    with _lock:
+        return list(_pages.values())
+
+
+def warm_report():
+    with _lock:
+        return [dict(row) for row in _warm.values()]
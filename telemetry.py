@@ -0,0 +1,247 @@
+import socket
+import threading
+
+import numpy as np
+import pandas as pd
+import requests
+import urllib3
+
+import api_client
+from constants import (
+    DEVICE_PROBE_TIMEOUT,
+    DEVICE_TELEMETRY_PATH,
+    MONITOR_BUFFER_SIZE,
+    MONITOR_READ_CHUNK,
+    MONITOR_READ_TIMEOUT,
+)
+from decimation import DEFAULT_POINTS, minmax_indices
+from log_parser import TIME_COLUMN, parse_data_line
+
+# Пауза перед повторным подключением к потоку после ошибки
+RECONNECT_DELAY = 2
+
+# Ошибки чтения потока, в том числе от закрытия соединения в stop()
+STREAM_ERRORS = (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, OSError)
+
+
+class RingBuffer:
+    """
+    Кольцевой буфер последних capacity отсчётов телеметрии.
+
+    Числовые параметры хранятся в заранее выделенных numpy-массивах, поэтому
+    добавление отсчёта не выделяет память, а объём не растёт с длительностью теста.
+    Для текстовых параметров (например, статус зарядки) хранится только последнее значение.
+    """
+
+    def __init__(self, capacity=MONITOR_BUFFER_SIZE):
+        self.capacity = capacity
+        self.count = 0
+        self.latest = {}
+        self._columns = {}
+        self._lock = threading.Lock()
+
+    def append(self, sample):
+        with self._lock:
+            pos = self.count % self.capacity
+            written = set()
+            for key, value in sample.items():
+                self.latest[key] = value
+                if not isinstance(value, (int, float)):
+                    continue
+                column = self._columns.get(key)
+                if column is None:
+                    column = np.full(self.capacity, np.nan)
+                    self._columns[key] = column
+                column[pos] = value
+                written.add(key)
+            for key, column in self._columns.items():
+                if key not in written:
+                    column[pos] = np.nan
+            self.count += 1
+
+    def columns(self):
+        with self._lock:
+            return list(self._columns)
+
+    def to_frame(self):
+        """
+        Возвращает копию содержимого буфера в хронологическом порядке.
+        """
+        with self._lock:
+            size = min(self.count, self.capacity)
+            pos = self.count % self.capacity
+            data = {}
+            for key, column in self._columns.items():
+                if self.count <= self.capacity:
+                    data[key] = column[:size].copy()
+                else:
+                    data[key] = np.concatenate((column[pos:], column[:pos]))
+        return pd.DataFrame(data)
+
+    def snapshot(self, columns, n_points=DEFAULT_POINTS):
+        """
+        Прореженная копия буфера для графика: время и столбцы columns в
+        хронологическом порядке, всего около n_points строк. Строки отбираются
+        по min/max в корзинах каждого столбца, поэтому пики сохраняются, а
+        копируются только отобранные строки, а не весь буфер.
+        """
+        with self._lock:
+            size = min(self.count, self.capacity)
+            keys = [key for key in dict.fromkeys((TIME_COLUMN, *columns)) if key in self._columns]
+            values = [key for key in keys if key != TIME_COLUMN]
+            if not size or not keys:
+                return pd.DataFrame()
+
+            # Заполненный буфер хранит отсчёты двумя отрезками: от pos до конца и от начала до pos
+            pos = self.count % self.capacity
+            segments = [(pos, self.capacity), (0, pos)] if self.count > self.capacity and pos else [(0, size)]
+            budget = max(n_points // max(len(values), 1), 2)
+            rows = []
+            for lo, hi in segments:
+                n_out = max(budget * (hi - lo) // size, 2)
+                if hi - lo <= n_out:
+                    rows.append(np.arange(lo, hi))
+                elif values:
+                    indices = [minmax_indices(self._columns[key][lo:hi], n_out) for key in values]
+                    rows.append(np.unique(np.concatenate(indices)) + lo)
+                else:
+                    rows.append(np.linspace(lo, hi - 1, n_out).astype(np.int64))
+            rows = np.concatenate(rows)
+            return pd.DataFrame({key: self._columns[key][rows] for key in keys})
+
+
+class TelemetryStream:
+    """
+    Фоновое чтение потока телеметрии устройства в кольцевой буфер.
+    Устройство отдаёт строки того же формата key=value, что и лог на SD-карте.
+    """
+
+    def __init__(self, device_ip, capacity=MONITOR_BUFFER_SIZE):
+        self.device_ip = device_ip
+        self.url = f"http://{device_ip}{DEVICE_TELEMETRY_PATH}"
+        self.buffer = RingBuffer(capacity)
+        self.bad_lines = 0
+        self.error = None
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._connection = None
+        self._subscribers = set()
+        self._subscribers_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def subscribe(self, subscriber):
+        """
+        Подписывает сессию subscriber на поток и запускает чтение, если оно не идёт.
+        """
+        with self._subscribers_lock:
+            self._subscribers.add(subscriber)
+            self.start()
+
+    def unsubscribe(self, subscriber):
+        """
+        Отписывает сессию. Поток общий для всех сессий процесса, поэтому чтение
+        останавливается только после того, как отписалась последняя.
+        """
+        with self._subscribers_lock:
+            self._subscribers.discard(subscriber)
+            if not self._subscribers:
+                self.stop()
+
+    def subscribed(self, subscriber):
+        return subscriber in self._subscribers
+
+    def start(self):
+        if self.running:
+            if not self._stop.is_set():
+                return
+            # Поток после stop() ещё не вышел: соединение уже закрыто, он завершится сразу
+            self._thread.join()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"telemetry-{self.device_ip}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Останавливает чтение. Соединение закрывается сразу: чтение, которое ждёт
+        следующего отсчёта, иначе закончилось бы только с его приходом или по таймауту.
+        """
+        self._stop.set()
+        connection = self._connection
+        if connection is not None and connection.sock is not None:
+            try:
+                # close() не будит поток, заблокированный в recv, а shutdown будит
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with api_client.get(
+                    self.url, stream=True, retry=False, timeout=(DEVICE_PROBE_TIMEOUT, MONITOR_READ_TIMEOUT)
+                ) as response:
+                    response.raise_for_status()
+                    self._connection = response.raw.connection
+                    self.connected = True
+                    self.error = None
+                    self._read(response)
+            except STREAM_ERRORS as e:
+                if not self._stop.is_set():
+                    self.error = str(e)
+            self._connection = None
+            self.connected = False
+            self._stop.wait(RECONNECT_DELAY)
+
+    def _read(self, response):
+        """
+        Читает поток блоками до MONITOR_READ_CHUNK байт. read1 отдаёт то, что
+        уже пришло, поэтому редкие отсчёты не ждут заполнения блока.
+        """
+        tail = b""
+        while not self._stop.is_set():
+            data = response.raw.read1(MONITOR_READ_CHUNK, decode_content=True)
+            if not data:
+                break
+            *lines, tail = (tail + data).split(b"\n")
+            for raw in lines:
+                line = raw.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+                try:
+                    self.buffer.append(parse_data_line(line))
+                except ValueError:
+                    self.bad_lines += 1
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_stream(device_ip):
+    """
+    Возвращает поток телеметрии устройства, общий для всех сессий процесса.
+    """
+    with _streams_lock:
+        stream = _streams.get(device_ip)
+        if stream is None:
+            stream = TelemetryStream(device_ip)
+            _streams[device_ip] = stream
+    return stream
+
+
+def relative_time(df):
+    """
+    Переводит столбец времени в секунды от первого отсчёта в буфере.
+    """
+    if TIME_COLUMN in df.columns and len(df):
+        df[TIME_COLUMN] = df[TIME_COLUMN] - df[TIME_COLUMN].iloc[0]
+    return df
+
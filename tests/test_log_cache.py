@@ -0,0 +1,33 @@
+import io
+
+import numpy as np
+import pyarrow as pa
+
+from log_cache import LogCache, chunked_window_bounds
+from log_parser import parse_log, time_slice, window_bounds
+
+
+def make_frame(times):
+    data = "".join(f"time={t} bat_voltage=4000 bat_current=300\n" for t in times).encode("utf-8")
+    return parse_log(io.BytesIO(data))
+
+
+def test_get_window_matches_time_slice(tmp_path):
+    cache = LogCache(directory=str(tmp_path))
+    for name, times in (("sorted", range(1000, 2000)), ("unsorted", [*range(1000, 1500), *range(1200, 1700)])):
+        df = make_frame(times)
+        assert cache.put(name, df)
+
+        window = cache.get(name, (100.5, 300))
+        expected = time_slice(df, 100.5, 300)
+        assert window["Время"].tolist() == expected["Время"].tolist()
+        assert window.attrs["log_rows"] == len(df)
+        assert window.attrs["log_time_range"] == (df["Время"].min(), df["Время"].max())
+        assert len(cache.get(name)) == len(df)
+
+
+def test_chunked_window_bounds_match_whole_column():
+    values = np.arange(0, 3000, 3, dtype=np.int64)
+    column = pa.chunked_array([values[:100], values[100:101], values[101:]])
+    for start, end in ((-5, 10), (299.5, 301), (301, 302), (1500, 1e9)):
+        assert chunked_window_bounds(column, start, end) == tuple(window_bounds(values, start, end))
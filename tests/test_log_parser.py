@@ -0,0 +1,40 @@
+import io
+
+import metrics
+from log_parser import parse_log
+
+
+def make_log(n_lines, bad=None):
+    lines = [
+        f"time={1700000000 + i} bat_voltage={4100 - i * 0.5} bat_current=300 charge_status=DISCHARGE"
+        for i in range(n_lines)
+    ]
+    for pos, line in (bad or {}).items():
+        lines[pos] = line
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def test_bad_numeric_value_is_bad_line():
+    bad = {
+        500: "time=1700000500 bat_voltage=ERR bat_current=300 charge_status=DISCHARGE",
+        600: "time=1700000600 bat_voltage= bat_current=300 charge_status=DISCHARGE",
+    }
+    df = parse_log(io.BytesIO(make_log(1000, bad)))
+
+    assert len(df) == 998
+    assert df.attrs["bad_lines"] == 2
+    assert [line_number for line_number, _ in df.attrs["bad_line_samples"]] == [501, 601]
+    assert df["Напряжение батареи"].dtype.kind == "f"
+    assert metrics.summary(df)
+
+
+def test_bad_numeric_value_in_small_chunks():
+    bad = {999: "time=1700000999 bat_voltage=ERR bat_current=300 charge_status=DISCHARGE"}
+    data = make_log(1000, bad)
+    stats = []
+    df = parse_log(io.BytesIO(data), chunk_size=4096, progress=stats.append)
+
+    assert len(df) == 999
+    assert df.attrs["bad_lines"] == 1
+    assert df["Напряжение батареи"].dtype.kind == "f"
+    assert len(stats) > 1 and not stats[0]["frame"].empty
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+import metrics
+
+
+def test_discharge_capacity_ignores_charge_phase():
+    # Час заряда током 500 мА, затем час разряда током 300 мА
+    t = np.arange(7201, dtype=np.float64)
+    df = pd.DataFrame({
+        "Время": t,
+        "Напряжение батареи": np.full(len(t), 3700.0),
+        "Ток батареи": np.where(t <= 3600, 500.0, 300.0),
+        "Статус зарядки": pd.Categorical(np.where(t <= 3600, "CHARGE", "DISCHARGE")),
+    })
+
+    assert metrics.summary(df)["charge_mah"] > 790
+    assert abs(metrics.discharge_capacity(df) - 300) < 1
+    assert metrics.discharge_capacity(df.drop(columns="Статус зарядки")) is None
+
+
+def test_discharged_charge_counts_only_discharge_phases():
+    # Час разряда током 300 мА между часами заряда током 500 мА
+    t = np.arange(10801, dtype=np.float64)
+    discharging = (t > 3600) & (t <= 7200)
+    df = pd.DataFrame({
+        "Время": t,
+        "Ток батареи": np.where(discharging, 300.0, 500.0),
+        "Статус зарядки": pd.Categorical(np.where(discharging, "DISCHARGE", "CHARGE")),
+    })
+
+    charge = metrics.discharged_charge(df)
+    assert charge[3600] == 0
+    assert abs(charge[-1] - 300) < 1
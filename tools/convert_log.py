@@ -0,0 +1,61 @@
+"""
+Перевод лога в двоичный формат (см. log_formats) и сжатие gzip или zstd.
+
+Запуск из корня репозитория:
+    python tools/convert_log.py discharge_log.txt discharge_log.bin
+    python tools/convert_log.py discharge_log.txt discharge_log.bin.gz
+    python tools/convert_log.py discharge_log.txt discharge_log.txt.zst
+
+Формат результата задаётся именем: .bin — двоичные записи, иначе текст
+key=value; окончание .gz или .zst добавляет сжатие. Исходный лог может быть
+в любом формате, который понимает log_parser.parse_log.
+"""
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import time
+
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_formats import FORMAT_BINARY, open_log  # noqa: E402
+from log_parser import parse_log, write_binary_log  # noqa: E402
+
+
+def open_output(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "wb", compresslevel=6)
+    if path.endswith(".zst"):
+        return pa.CompressedOutputStream(path, "zstd")
+    return open(path, "wb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source")
+    parser.add_argument("target")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    binary = args.target.removesuffix(".gz").removesuffix(".zst").endswith(".bin")
+    with open(args.source, "rb") as source:
+        stream, _, fmt = open_log(source)
+        if fmt == FORMAT_BINARY and not binary:
+            raise SystemExit("Двоичный лог нельзя перевести обратно в текст")
+        with open_output(args.target) as output:
+            if binary:
+                write_binary_log(parse_log(stream), output)
+            else:
+                shutil.copyfileobj(stream, output)
+
+    print(
+        f"{args.source} ({os.path.getsize(args.source) / 2**20:.1f} МБ) -> "
+        f"{args.target} ({os.path.getsize(args.target) / 2**20:.1f} МБ) за {time.perf_counter() - started:.1f} с"
+    )
+
+
+if __name__ == "__main__":
+    main()
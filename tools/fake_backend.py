@@ -0,0 +1,188 @@
+"""
+Локальная замена backend API (API_URL) для проверки и замеров страниц без сервера.
+
+Запуск из корня репозитория:
+    python tools/fake_backend.py --batteries 1000 --devices 10 --latency 20
+
+Сервер отвечает на те же запросы, что и настоящий backend:
+    /batteries/            — список (skip, limit, serial_number) и создание
+    /batteries/{id}        — чтение, изменение и удаление записи
+    /get_device_list       — список устройств, все они указывают на этот же сервер
+    /status                — состояние устройства (для опроса устройств)
+    /start_device_actions  — запуск очереди действий
+
+Каждый ответ задерживается на --latency мс, число запросов считается
+(FakeBackend.calls), поэтому сервер можно запустить и в том же процессе,
+что и страницы (см. benchmarks/bench_pages.py).
+"""
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BATTERY_PATH = re.compile(r"^/batteries/(\d+)/?$")
+
+
+def make_batteries(count):
+    return {
+        battery_id: {
+            "id": battery_id,
+            "serial_number": f"SN{battery_id:06d}",
+            "capacity": 3000 + battery_id % 500,
+            "comments": None if battery_id % 3 else f"Партия {battery_id // 100}",
+        }
+        for battery_id in range(1, count + 1)
+    }
+
+
+class FakeBackend(ThreadingHTTPServer):
+    """
+    HTTP-сервер с каталогом аккумуляторов и списком устройств в памяти.
+    """
+    daemon_threads = True
+
+    def __init__(self, address, batteries=30, devices=3, latency=0.0):
+        super().__init__(address, FakeBackendHandler)
+        self.batteries = make_batteries(batteries)
+        host, port = self.server_address[:2]
+        self.devices = [
+            {"device_status": "online", "device_name": f"rig{i}", "device_ip": f"{host}:{port}", "sd_free_mem": 4}
+            for i in range(devices)
+        ]
+        self.latency = latency
+        self.calls = 0
+        self.bytes_sent = 0
+        self.lock = threading.Lock()
+
+    def reset_counters(self):
+        with self.lock:
+            self.calls = 0
+            self.bytes_sent = 0
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def begin(self):
+        """
+        Учитывает запрос и выдерживает заданную задержку. Возвращает путь и параметры.
+        """
+        with self.server.lock:
+            self.server.calls += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        url = urlparse(self.path)
+        return url.path, parse_qs(url.query)
+
+    def do_GET(self):
+        path, query = self.begin()
+        batteries = self.server.batteries
+        match = BATTERY_PATH.match(path)
+        if path == "/batteries/":
+            skip = int(query.get("skip", [0])[0])
+            limit = int(query.get("limit", [100])[0])
+            items = [batteries[battery_id] for battery_id in sorted(batteries)]
+            if "serial_number" in query:
+                needle = query["serial_number"][0].lower()
+                items = [battery for battery in items if needle in battery["serial_number"].lower()]
+            self.send_json(items[skip:skip + limit])
+        elif match:
+            battery = batteries.get(int(match[1]))
+            if battery is None:
+                self.send_json({"detail": "Battery not found"}, status=404)
+            else:
+                self.send_json(battery)
+        elif path == "/get_device_list":
+            self.send_json(self.server.devices)
+        elif path == "/status":
+            self.send_json({"device_status": "online", "sd_free_mem": 7})
+        else:
+            self.send_json({"detail": "Not found"}, status=404)
+
+    def do_POST(self):
+        path, _ = self.begin()
+        data = self.read_json()
+        if path == "/batteries/":
+            with self.server.lock:
+                battery_id = max(self.server.batteries, default=0) + 1
+                battery = {**data, "id": battery_id}
+                self.server.batteries[battery_id] = battery
+            self.send_json(battery)
+        elif path == "/start_device_actions":
+            self.send_json({"detail": "started"})
+        else:
+            self.send_json({"detail": "Not found"}, status=404)
+
+    def do_PUT(self):
+        path, _ = self.begin()
+        data = self.read_json()
+        match = BATTERY_PATH.match(path)
+        if not match or int(match[1]) not in self.server.batteries:
+            self.send_json({"detail": "Battery not found"}, status=404)
+            return
+        battery = {**data, "id": int(match[1])}
+        self.server.batteries[battery["id"]] = battery
+        self.send_json(battery)
+
+    def do_DELETE(self):
+        path, _ = self.begin()
+        match = BATTERY_PATH.match(path)
+        battery = self.server.batteries.pop(int(match[1]), None) if match else None
+        if battery is None:
+            self.send_json({"detail": "Battery not found"}, status=404)
+        else:
+            self.send_json(battery)
+
+
+def serve(port, batteries=30, devices=3, latency=0.0, host="127.0.0.1"):
+    """
+    Создаёт сервер; latency задаётся в секундах.
+    """
+    return FakeBackend((host, port), batteries, devices, latency)
+
+
+def start(port, batteries=30, devices=3, latency=0.0, host="127.0.0.1"):
+    """
+    Запускает сервер в фоновом потоке текущего процесса.
+    """
+    server = serve(port, batteries, devices, latency, host)
+    threading.Thread(target=server.serve_forever, name="fake-backend", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=21216)
+    parser.add_argument("--batteries", type=int, default=30, help="число аккумуляторов в каталоге")
+    parser.add_argument("--devices", type=int, default=3, help="число устройств в списке")
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка каждого ответа, мс")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.batteries, args.devices, args.latency / 1000, args.host)
+    print(f"Backend слушает {args.host}:{args.port}, аккумуляторов: {args.batteries}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
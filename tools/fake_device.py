@@ -0,0 +1,203 @@
+"""
+Локальная замена испытательного стенда для проверки страниц без оборудования.
+
+Запуск из корня репозитория:
+    python tools/fake_device.py --port 8081 --rate 5
+    python tools/fake_device.py --sd-dir logs/ --drop-after 1000000
+
+После запуска устройство доступно по адресу 127.0.0.1:8081:
+    /status          — состояние устройства (JSON)
+    /telemetry       — бесконечный поток строк key=value с частотой --rate в секунду
+    /sd/files        — список логов на SD-карте: имя, размер, время изменения (JSON)
+    /sd/files/{имя}  — содержимое лога, поддерживаются запросы Range
+
+Логи берутся из каталога --sd-dir, без него на карте лежит один
+синтетический лог из --sd-lines строк. --drop-after обрывает каждый ответ
+с логом после указанного числа байт, чтобы проверить докачку.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+SD_PATH = "/sd/files"
+SD_CHUNK = 256 * 1024
+RANGE_HEADER = re.compile(r"^bytes=(\d+)-(\d*)$")
+
+
+def telemetry_line(t, started):
+    """
+    Синтетический отсчёт разрядки: напряжение плавно падает, ток и температура шумят.
+    """
+    elapsed = t - started
+    voltage = 4200 - 1450 * (1 - math.exp(-elapsed / 3600))
+    return (
+        f"time={t:.0f} temp_bat={25 + random.gauss(0, 0.2):.2f} temp_env={24 + random.gauss(0, 0.1):.2f} "
+        f"bat_voltage={voltage + random.gauss(0, 2):.1f} bat_current={300 + random.gauss(0, 1.5):.1f} "
+        f"load_duty={random.randint(18, 22)} charge_status=DISCHARGE"
+    )
+
+
+def synthetic_log(n_lines, started):
+    """
+    Лог разрядки из n_lines строк с шагом в секунду, как его пишет стенд на SD-карту.
+    """
+    return "".join(telemetry_line(started + i, started) + "\n" for i in range(n_lines)).encode("utf-8")
+
+
+class SdCard:
+    """
+    Файлы SD-карты: из каталога на диске или синтетические в памяти.
+    """
+
+    def __init__(self, directory=None, n_lines=10000):
+        self.directory = directory
+        self.files = {}
+        if directory is None:
+            self.files["discharge_log.txt"] = (synthetic_log(n_lines, time.time()), int(time.time()))
+
+    def listing(self):
+        if self.directory is None:
+            return [{"name": name, "size": len(data), "mtime": mtime} for name, (data, mtime) in self.files.items()]
+        entries = []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append({"name": name, "size": stat.st_size, "mtime": int(stat.st_mtime)})
+        return entries
+
+    def open(self, name):
+        """
+        Возвращает (размер, функция чтения диапазона) или None, если файла нет.
+        """
+        if self.directory is None:
+            if name not in self.files:
+                return None
+            data = self.files[name][0]
+            return len(data), lambda start, end: data[start:end]
+        path = os.path.join(self.directory, os.path.basename(name))
+        if not os.path.isfile(path):
+            return None
+
+        def read(start, end):
+            with open(path, "rb") as f:
+                f.seek(start)
+                return f.read(end - start)
+
+        return os.path.getsize(path), read
+
+
+class FakeDeviceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    rate = 5.0
+    sd_card = None
+    drop_after = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self.send_json({"device_status": "online", "sd_free_mem": 7})
+        elif self.path == "/telemetry":
+            self.stream_telemetry()
+        elif self.path == SD_PATH:
+            self.send_json(self.sd_card.listing())
+        elif self.path.startswith(f"{SD_PATH}/"):
+            self.send_sd_file(unquote(self.path[len(SD_PATH) + 1:]))
+        else:
+            self.send_json({"detail": "Not found"}, status=404)
+
+    def send_sd_file(self, name):
+        opened = self.sd_card.open(name)
+        if opened is None:
+            self.send_json({"detail": "File not found"}, status=404)
+            return
+        size, read = opened
+
+        start, end = 0, size
+        match = RANGE_HEADER.match(self.headers.get("Range", ""))
+        if match:
+            start = int(match[1])
+            end = min(int(match[2]) + 1, size) if match[2] else size
+            if start >= size or start >= end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(end - start))
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{size}")
+        self.end_headers()
+
+        limit = end if self.drop_after is None else min(end, start + self.drop_after)
+        try:
+            for offset in range(start, limit, SD_CHUNK):
+                self.wfile.write(read(offset, min(offset + SD_CHUNK, limit)))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        if limit < end:
+            # Имитация обрыва связи посреди ответа
+            self.close_connection = True
+
+    def stream_telemetry(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        started = time.time()
+        try:
+            while True:
+                line = (telemetry_line(time.time(), started) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+                self.wfile.flush()
+                time.sleep(1 / self.rate)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def serve(port, rate, host="127.0.0.1", sd_card=None, drop_after=None):
+    FakeDeviceHandler.rate = rate
+    FakeDeviceHandler.sd_card = sd_card or SdCard()
+    FakeDeviceHandler.drop_after = drop_after
+    server = ThreadingHTTPServer((host, port), FakeDeviceHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--rate", type=float, default=5.0, help="отсчётов телеметрии в секунду")
+    parser.add_argument("--sd-dir", help="каталог с логами, которые отдаются как файлы SD-карты")
+    parser.add_argument("--sd-lines", type=int, default=10000, help="строк в синтетическом логе без --sd-dir")
+    parser.add_argument("--drop-after", type=int, help="обрывать ответ с логом после стольких байт")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.rate, args.host, SdCard(args.sd_dir, args.sd_lines), args.drop_after)
+    print(f"Устройство слушает {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()